@@ -1,11 +1,107 @@
+import asyncio
+import orjson
+import re
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator
 from db.models import DocumentRecord, CredibilityScore, Claim
+from agents.llm_cache import cached_chat_completion
+from agents.scoring_utils import recency_scores
+from agents.source_authority import get_source_authorities, get_source_authority
+from config import settings
+
+# "Now" for recency scoring, frozen per orchestrator run so every doc in a job is
+# aged against the same instant (and datetime.now isn't called per doc).
+_frozen_now: ContextVar[datetime | None] = ContextVar("frozen_now", default=None)
+
+
+def scoring_now() -> datetime:
+    """The frozen timestamp for the current run, or the wall clock outside one."""
+    return _frozen_now.get() or datetime.now(timezone.utc)
+
+
+@contextmanager
+def freeze_now(now: datetime | None = None) -> Iterator[datetime]:
+    """Pin `scoring_now()` to one UTC instant for everything run inside the block."""
+    frozen = now or datetime.now(timezone.utc)
+    token = _frozen_now.set(frozen)
+    try:
+        yield frozen
+    finally:
+        _frozen_now.reset(token)
+
+
+# Documents packed into one claim-extraction request
+CLAIMS_PACK_SIZE = 8
+
+# Text-signal scorers only look at the head and tail of long documents;
+# link/citation/statute signals saturate long before this many characters.
+SCAN_HEAD_CHARS = 20_000
+SCAN_TAIL_CHARS = 5_000
+
+
+def scan_window(text: str) -> str:
+    """Bounded view of `text` for regex scorers: the first 20k + last 5k chars."""
+    if len(text) <= SCAN_HEAD_CHARS + SCAN_TAIL_CHARS:
+        return text
+    return text[:SCAN_HEAD_CHARS] + "\n" + text[-SCAN_TAIL_CHARS:]
+
+
+def first_sentences(text: str, sep_re: re.Pattern, n: int, min_len: int = 40) -> list[str]:
+    """
+    Same result as `[s.strip() for s in sep_re.split(text)[:n] if len(s.strip()) > min_len]`,
+    but walks separator matches lazily and stops after `n` pieces instead of
+    splitting the whole document.
+    """
+    out: list[str] = []
+    last = 0
+    seen = 0
+    for m in sep_re.finditer(text):
+        if seen == n:
+            return out
+        piece = text[last:m.start()].strip()
+        if len(piece) > min_len:
+            out.append(piece)
+        seen += 1
+        last = m.end()
+    if seen < n:
+        piece = text[last:].strip()
+        if len(piece) > min_len:
+            out.append(piece)
+    return out
 
 
 class DocumentAgent(ABC):
     """Abstract base for all document-type sub-agents."""
 
     doc_type: str = "unknown"
+    # Agents whose claim prompt works for several docs at once set these to
+    # enable packed extraction in `extract_claims_batch`.
+    claims_pack_instructions: str | None = None
+    claims_pack_max_chars: int = 3000
+    # (decay_days, floor) for agents whose date-based recency is
+    # `max(floor, exp(-age_days / decay_days))`; `process_batch` scores the
+    # whole batch's published dates at once and `batch_recency` serves them.
+    recency_decay: tuple[float, float] | None = None
+    # Agents that score `source_url` via source_authority set this so
+    # `process_batch` resolves every URL of the batch in one lookup.
+    uses_source_authority: bool = False
+
+    def __init__(self) -> None:
+        self._batch_recency: dict[str, float] = {}
+        self._batch_authority: dict[str, float] = {}
+
+    def batch_recency(self, doc: DocumentRecord) -> float | None:
+        """Recency precomputed by `process_batch`, or None to use the per-doc scorer."""
+        return self._batch_recency.get(doc.doc_id)
+
+    async def source_authority(self, doc: DocumentRecord) -> float:
+        """Authority prefetched by `process_batch`, else a single lookup."""
+        if doc.source_url in self._batch_authority:
+            return self._batch_authority[doc.source_url]
+        return await get_source_authority(doc.source_url)
 
     @abstractmethod
     async def score_credibility(self, doc: DocumentRecord) -> CredibilityScore:
@@ -15,8 +111,97 @@ class DocumentAgent(ABC):
     async def extract_claims(self, doc: DocumentRecord) -> list[Claim]:
         """Extract atomic factual claims from the document text."""
 
+    async def extract_claims_batch(self, docs: list[DocumentRecord]) -> list[list[Claim]]:
+        """Extract claims for several docs of this type, packing them per request when supported."""
+        if not self.claims_pack_instructions or not settings.openai_api_key or len(docs) < 2:
+            return list(await asyncio.gather(*(self.extract_claims(doc) for doc in docs)))
+        packed = await pack_extract_claims(docs, self.claims_pack_instructions, self.claims_pack_max_chars)
+        # Anything the model skipped goes through the single-doc path
+        missing = [doc for doc in docs if doc.doc_id not in packed]
+        for doc, claims in zip(missing, await asyncio.gather(*(self.extract_claims(d) for d in missing))):
+            packed[doc.doc_id] = claims
+        return [packed[doc.doc_id] for doc in docs]
+
     async def process(self, doc: DocumentRecord) -> DocumentRecord:
-        """Score + extract claims and mutate the doc record in place."""
-        doc.credibility_score = await self.score_credibility(doc)
-        doc.claims = await self.extract_claims(doc)
+        """Score + extract claims (concurrently) and mutate the doc record in place."""
+        doc.credibility_score, doc.claims = await asyncio.gather(
+            self.score_credibility(doc), self.extract_claims(doc)
+        )
         return doc
+
+    async def prepare_batch(self, docs: list[DocumentRecord]) -> None:
+        """Precompute per-batch scoring inputs; subclasses extend this with their own lookups."""
+        if self.recency_decay:
+            dates = [doc.metadata.get("published_date") for doc in docs]
+            scores = recency_scores(dates, *self.recency_decay, now=scoring_now())
+            self._batch_recency = {
+                doc.doc_id: float(score) for doc, score in zip(docs, scores) if score == score  # skip NaN
+            }
+        if self.uses_source_authority:
+            self._batch_authority = await get_source_authorities([doc.source_url for doc in docs])
+
+    async def score_batch(self, docs: list[DocumentRecord]) -> list[CredibilityScore]:
+        await self.prepare_batch(docs)
+        return list(await asyncio.gather(*(self.score_credibility(doc) for doc in docs)))
+
+    async def process_batch(self, docs: list[DocumentRecord]) -> list[DocumentRecord]:
+        """`process` for several same-type docs, letting claim extraction share requests."""
+        scores, claims = await asyncio.gather(
+            self.score_batch(docs),
+            self.extract_claims_batch(docs),
+        )
+        for doc, score, doc_claims in zip(docs, scores, claims):
+            doc.credibility_score = score
+            doc.claims = doc_claims
+        return docs
+
+
+async def pack_extract_claims(
+    docs: list[DocumentRecord],
+    instructions: str,
+    max_chars: int,
+    pack_size: int = CLAIMS_PACK_SIZE,
+) -> dict[str, list[Claim]]:
+    """
+    Extract claims for up to `pack_size` docs per LLM request, amortising the
+    system prompt and round-trip. Returns {doc_id: claims} for every doc the
+    model answered for; callers fall back to per-doc extraction for the rest.
+    """
+    async def _one_pack(pack: list[DocumentRecord]) -> dict[str, list[Claim]]:
+        payload = [{"id": doc.doc_id, "text": doc.raw_text[:max_chars]} for doc in pack]
+        content = await cached_chat_completion(
+            model=settings.openai_model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        f"{instructions} You will receive a JSON array of documents, each with "
+                        'an "id" and "text". Return JSON: {"results": [{"id": <id>, "claims": [...]}]} '
+                        "with exactly one entry per document."
+                    ),
+                },
+                {"role": "user", "content": orjson.dumps(payload).decode()},
+            ],
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        try:
+            results = orjson.loads(content).get("results", [])
+        except Exception:
+            return {}
+        known = {doc.doc_id for doc in pack}
+        out: dict[str, list[Claim]] = {}
+        for item in results:
+            if not isinstance(item, dict) or item.get("id") not in known:
+                continue
+            out[item["id"]] = [
+                Claim.from_trusted(text=t, source_doc_id=item["id"])
+                for t in item.get("claims", []) if isinstance(t, str)
+            ]
+        return out
+
+    packs = [docs[i: i + pack_size] for i in range(0, len(docs), pack_size)]
+    merged: dict[str, list[Claim]] = {}
+    for result in await asyncio.gather(*(_one_pack(p) for p in packs)):
+        merged.update(result)
+    return merged
@@ -0,0 +1,140 @@
+"""
+OpenAI Batch API dispatcher for bulk ingestion.
+
+While a dispatcher is active (see `batch_mode`), every chat completion issued via
+`agents.llm_cache.cached_chat_completion` is queued instead of sent. Once no new
+request has arrived for `linger` seconds the queue is flushed as one JSONL batch:
+
+    files.create(purpose="batch") → batches.create → poll batches.retrieve
+    → files.content(output_file_id) → resolve each caller's future
+
+Batch requests are billed at ~50% and draw on a separate rate-limit pool, at the
+cost of latency (minutes to hours), so this is only for non-interactive runs.
+"""
+from __future__ import annotations
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+import orjson
+
+_ENDPOINT = "/v1/chat/completions"
+_IN_FLIGHT_STATUSES = ("validating", "in_progress", "finalizing")
+
+_active: ContextVar["BatchDispatcher | None"] = ContextVar("batch_dispatcher", default=None)
+
+
+class BatchDispatcher:
+    def __init__(
+        self,
+        client,
+        linger: float = 0.5,
+        poll_interval: float = 15.0,
+        completion_window: str = "24h",
+    ):
+        self._client = client
+        self._linger = linger
+        self._poll_interval = poll_interval
+        self._completion_window = completion_window
+        self._pending: dict[str, tuple[dict, asyncio.Future]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, params: dict, request_id: str | None = None) -> str:
+        """Queue one chat-completion request; resolves to the message content."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending[request_id or str(uuid.uuid4())] = (params, future)
+        # Debounce: flush once callers have stopped submitting for `linger` seconds
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = loop.call_later(self._linger, self._schedule_flush)
+        return await future
+
+    def _schedule_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:
+        """Send everything queued so far as one batch and resolve its futures."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            outputs = await self._run_batch({rid: params for rid, (params, _) in pending.items()})
+        except Exception as exc:
+            for _, future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for rid, (_, future) in pending.items():
+            if future.done():
+                continue
+            result = outputs.get(rid)
+            if isinstance(result, str):
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(f"Batch request {rid} failed: {result or 'no output'}"))
+
+    async def aclose(self) -> None:
+        """Flush anything still queued and wait for in-flight batches."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def _run_batch(self, requests: dict[str, dict]) -> dict[str, str | dict | None]:
+        # orjson emits UTF-8 bytes directly: no str round-trip for the bulk document text
+        lines = [
+            orjson.dumps({"custom_id": rid, "method": "POST", "url": _ENDPOINT, "body": body})
+            for rid, body in requests.items()
+        ]
+        upload = await self._client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = await self._client.batches.create(
+            input_file_id=upload.id,
+            endpoint=_ENDPOINT,
+            completion_window=self._completion_window,
+        )
+        while batch.status in _IN_FLIGHT_STATUSES:
+            await asyncio.sleep(self._poll_interval)
+            batch = await self._client.batches.retrieve(batch.id)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status '{batch.status}'")
+
+        content = await self._client.files.content(batch.output_file_id)
+        outputs: dict[str, str | dict | None] = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                outputs[row["custom_id"]] = row.get("error") or response.get("body")
+                continue
+            outputs[row["custom_id"]] = response["body"]["choices"][0]["message"]["content"] or ""
+        return outputs
+
+
+def current_dispatcher() -> BatchDispatcher | None:
+    """The dispatcher active in this context, if any."""
+    return _active.get()
+
+
+@asynccontextmanager
+async def batch_mode(client, **kwargs) -> AsyncIterator[BatchDispatcher]:
+    """Route chat completions issued inside this block through the Batch API."""
+    dispatcher = BatchDispatcher(client, **kwargs)
+    token = _active.set(dispatcher)
+    try:
+        yield dispatcher
+    finally:
+        _active.reset(token)
+        await dispatcher.aclose()
@@ -8,47 +8,52 @@ Credibility signals:
 """
 from __future__ import annotations
 import re
-import json
+import orjson
 import math
+from functools import cache, lru_cache
 from pathlib import Path
-from datetime import datetime, timezone
-from agents.base_agent import DocumentAgent
+from datetime import datetime
+from agents.base_agent import DocumentAgent, first_sentences, scan_window, scoring_now
+from agents.source_authority import url_host, host_suffixes
 from db.models import DocumentRecord, CredibilityScore, Claim
 from config import settings
+from agents.llm_cache import cached_chat_completion
 
 _DOMAIN_DB_PATH = Path(__file__).parent.parent / "data" / "domain_authority_db.json"
-_DOMAIN_DB: dict[str, float] = {}
 
+_LINK_RE = re.compile(r"https?://[^\s)>\"]+")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
 
+
+@cache
 def _load_domain_db() -> dict[str, float]:
-    global _DOMAIN_DB
-    if _DOMAIN_DB:
-        return _DOMAIN_DB
+    """Loaded once per process; safe to call from any task or thread."""
     if _DOMAIN_DB_PATH.exists():
-        with open(_DOMAIN_DB_PATH) as f:
-            _DOMAIN_DB = json.load(f)
-    else:
-        _DOMAIN_DB = {
-            "medium.com": 0.72, "substack.com": 0.65, "wordpress.com": 0.55,
-            "towardsdatascience.com": 0.82, "hackernoon.com": 0.75,
-            "techcrunch.com": 0.88, "wired.com": 0.87, "ycombinator.com": 0.90,
-        }
-    return _DOMAIN_DB
+        return orjson.loads(_DOMAIN_DB_PATH.read_bytes())
+    return {
+        "medium.com": 0.72, "substack.com": 0.65, "wordpress.com": 0.55,
+        "towardsdatascience.com": 0.82, "hackernoon.com": 0.75,
+        "techcrunch.com": 0.88, "wired.com": 0.87, "ycombinator.com": 0.90,
+    }
 
 
 def _domain_score(url: str | None) -> float:
     if not url:
         return 0.4
+    return _domain_score_for_host(url_host(url))
+
+
+@lru_cache(maxsize=4096)
+def _domain_score_for_host(host: str) -> float:
     db = _load_domain_db()
-    for domain, score in db.items():
-        if domain in url:
-            return score
+    for suffix in host_suffixes(host):
+        if suffix in db:
+            return db[suffix]
     return 0.45
 
 
-def _references_score(text: str) -> float:
-    """Count external links and named references."""
-    links = len(re.findall(r"https?://[^\s)>\"]+", text))
+def _references_score(links: int) -> float:
+    """Score external references from a precomputed link count."""
     return min(links * 0.08, 1.0) if links else 0.2
 
 
@@ -57,7 +62,7 @@ def _recency_score(published_date: str | None) -> float:
         return 0.4
     try:
         date = datetime.fromisoformat(published_date.replace("Z", "+00:00"))
-        age_days = (datetime.now(timezone.utc) - date).days
+        age_days = (scoring_now() - date).days
         return max(0.1, math.exp(-age_days / 730))  # 2yr half-life for blogs
     except Exception:
         return 0.4
@@ -67,9 +72,7 @@ async def _author_credentials_score(text: str) -> float:
     """Ask GPT to assess author authority from bio/intro text."""
     if not settings.openai_api_key:
         return 0.5
-    from openai import AsyncOpenAI
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
-    resp = await client.chat.completions.create(
+    content = await cached_chat_completion(
         model=settings.openai_model,
         messages=[
             {
@@ -86,7 +89,7 @@ async def _author_credentials_score(text: str) -> float:
         response_format={"type": "json_object"},
     )
     try:
-        data = json.loads(resp.choices[0].message.content)
+        data = orjson.loads(content)
         return float(data.get("score", 0.5))
     except Exception:
         return 0.5
@@ -94,14 +97,21 @@ async def _author_credentials_score(text: str) -> float:
 
 class BlogAgent(DocumentAgent):
     doc_type = "blog_post"
+    claims_pack_instructions = "Extract 4–6 key factual claims from each document."
+    claims_pack_max_chars = 3000
+    recency_decay = (730, 0.1)
 
     async def score_credibility(self, doc: DocumentRecord) -> CredibilityScore:
         url = doc.source_url
         published_date = doc.metadata.get("published_date")
 
         domain = _domain_score(url)
-        references = _references_score(doc.raw_text)
-        recency = _recency_score(published_date)
+        scanned = scan_window(doc.raw_text)
+        links = len(_LINK_RE.findall(scanned))
+        references = _references_score(links)
+        recency = self.batch_recency(doc)
+        if recency is None:
+            recency = _recency_score(published_date)
         author = await _author_credentials_score(doc.raw_text)
 
         overall = (
@@ -111,7 +121,6 @@ class BlogAgent(DocumentAgent):
             + 0.20 * recency
         )
 
-        links = len(re.findall(r"https?://[^\s)<\"]+", doc.raw_text))
         return CredibilityScore(
             overall=round(overall, 4),
             breakdown={
@@ -129,7 +138,8 @@ class BlogAgent(DocumentAgent):
                     f"{'Strong author credentials detected' if author >= 0.75 else 'Some author credentials detected' if author >= 0.45 else 'Limited or no author credentials found'} via LLM assessment — score: {round(author * 100)}%"
                 ),
                 "external_references": (
-                    f"{links} external link{'s' if links != 1 else ''} found in document — "
+                    f"{links} external link{'s' if links != 1 else ''} found in "
+                    + ("document — " if scanned is doc.raw_text else "the first/last sections of this long document — ")
                     + ('well-referenced' if references >= 0.5 else 'moderately referenced' if references >= 0.25 else 'few or no external sources cited')
                 ),
                 "recency": (
@@ -141,11 +151,9 @@ class BlogAgent(DocumentAgent):
 
     async def extract_claims(self, doc: DocumentRecord) -> list[Claim]:
         if not settings.openai_api_key:
-            sentences = re.split(r"(?<=[.!?])\s+", doc.raw_text)
-            return [Claim(text=s.strip(), source_doc_id=doc.doc_id) for s in sentences[:6] if len(s) > 40]
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        resp = await client.chat.completions.create(
+            sentences = first_sentences(doc.raw_text, _SENTENCE_SPLIT_RE, 6)
+            return [Claim.from_trusted(text=s, source_doc_id=doc.doc_id) for s in sentences]
+        content = await cached_chat_completion(
             model=settings.openai_model,
             messages=[
                 {"role": "system", "content": 'Extract 4–6 key factual claims. Return JSON: {"claims": [...]}'},
@@ -155,7 +163,7 @@ class BlogAgent(DocumentAgent):
             response_format={"type": "json_object"},
         )
         try:
-            data = json.loads(resp.choices[0].message.content)
-            return [Claim(text=t, source_doc_id=doc.doc_id) for t in data.get("claims", []) if isinstance(t, str)]
+            data = orjson.loads(content)
+            return [Claim.from_trusted(text=t, source_doc_id=doc.doc_id) for t in data.get("claims", []) if isinstance(t, str)]
         except Exception:
             return []
@@ -5,7 +5,10 @@ Fallback: GPT-4o-mini for low-confidence cases (requires OPENAI_API_KEY)
 """
 from __future__ import annotations
 import re
+from functools import cache
+import ahocorasick
 from config import settings
+from agents.llm_cache import cached_chat_completion
 
 DOC_TYPES = ["research_paper", "news_article", "blog_post", "legal_document", "unknown"]
 
@@ -76,19 +79,70 @@ _SIGNALS: dict[str, dict] = {
     },
 }
 
+# Compiled once at import — every classification reuses these
+_COMPILED_PATTERNS: dict[str, list[re.Pattern]] = {
+    doc_type: [re.compile(p, re.IGNORECASE | re.DOTALL) for p in signals["patterns"]]
+    for doc_type, signals in _SIGNALS.items()
+}
+# One alternation per type: a single search tells us whether *any* of its
+# patterns occurs, so the per-pattern loop only runs on docs with a hit.
+_PATTERN_UNION: dict[str, re.Pattern] = {
+    doc_type: re.compile("|".join(f"(?:{p})" for p in signals["patterns"]), re.IGNORECASE | re.DOTALL)
+    for doc_type, signals in _SIGNALS.items()
+}
+
+# Single automaton over every keyword table: one pass over the sample finds all
+# (possibly overlapping) keyword hits instead of one substring scan per keyword.
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    owners: dict[str, list[str]] = {}
+    for doc_type, signals in _SIGNALS.items():
+        for kw in signals["keywords"]:
+            owners.setdefault(kw.lower(), []).append(doc_type)
+    automaton = ahocorasick.Automaton()
+    for kw, doc_types in owners.items():
+        automaton.add_word(kw, (kw, tuple(doc_types)))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AC = _build_keyword_automaton()
+
+# Literal substrings at least one of which must occur (case-insensitively) for
+# any of a type's patterns to match. Checked with `in` on the lowercased sample
+# before any regex runs for that type.
+_FAST_GATES: dict[str, tuple[str, ...]] = {
+    "research_paper": ("abstract", "references", "introduction", "doi.org", "arxiv.org"),
+    "news_article": ("by ", "day", "reuters", "ap news", "bbc", "cnn", "npr", " ago"),
+    "blog_post": ("substack.com", "medium.com", "wordpress", "subscribe"),
+    "legal_document": ("whereas", "hereinafter", "party of the first part", "pursuant to", "§"),
+}
+
+_LEGAL_HINT_RE = re.compile(r"\bwhereas\b|\bhereinafter\b|\bpursuant to\b")
+_BYLINE_HINT_RE = re.compile(r"\bby [A-Z][a-z]+ [A-Z][a-z]+\b")
+
 
 def _keyword_score(text: str, title: str = "") -> dict[str, float]:
     """Score each document type based on keyword and pattern hits."""
     sample = (title + "\n\n" + text).lower()[:3000]
     sample_raw = (title + "\n\n" + text)[:3000]
 
+    # Each distinct keyword counts once per doc type, however often it occurs
+    seen: set[str] = set()
+    kw_counts: dict[str, int] = dict.fromkeys(_SIGNALS, 0)
+    for _, (kw, doc_types) in _KEYWORD_AC.iter(sample):
+        if kw in seen:
+            continue
+        seen.add(kw)
+        for doc_type in doc_types:
+            kw_counts[doc_type] += 1
+
     scores: dict[str, float] = {}
     for doc_type, signals in _SIGNALS.items():
-        kw_hits = sum(1 for kw in signals["keywords"] if kw.lower() in sample)
-        pat_hits = sum(
-            1 for pat in signals["patterns"]
-            if re.search(pat, sample_raw, re.IGNORECASE | re.DOTALL)
-        )
+        kw_hits = kw_counts[doc_type]
+        pat_hits = 0
+        gated = any(g in sample for g in _FAST_GATES[doc_type])
+        if gated and _PATTERN_UNION[doc_type].search(sample_raw):
+            pat_hits = sum(1 for pat in _COMPILED_PATTERNS[doc_type] if pat.search(sample_raw))
         # Normalise: keywords out of total, patterns weighted more
         kw_score = kw_hits / max(len(signals["keywords"]), 1)
         pat_score = pat_hits / max(len(signals["patterns"]), 1)
@@ -111,32 +165,49 @@ async def classify_document(text: str, title: str = "") -> str:
     return await _classify_with_llm(text, title)
 
 
+@cache
+def _label_logit_bias(model: str) -> dict[str, int] | None:
+    """
+    Bias every token of the DOC_TYPES labels to +100 so the model can only
+    emit label pieces. None if the tokenizer for `model` isn't available
+    (unknown model, or BPE files can't be fetched offline).
+    """
+    try:
+        import tiktoken
+        enc = tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+    return {str(tok): 100 for label in DOC_TYPES for tok in enc.encode(label)}
+
+
+# Each label starts with a distinct word, so a response biased into a
+# mismatched pair like "news_post" still maps back to one label.
+_LABEL_BY_HEAD = {label.split("_")[0]: label for label in DOC_TYPES}
+
+
 async def _classify_with_llm(text: str, title: str = "") -> str:
     """Fallback GPT classification for ambiguous documents."""
     if not settings.openai_api_key:
         # No key — use rule-based hints as last resort
         return _simple_hint(text) or "unknown"
-    from openai import AsyncOpenAI
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
     sample = (title + "\n\n" + text)[:2000]
-    resp = await client.chat.completions.create(
+    params: dict = {"max_tokens": 10}
+    logit_bias = _label_logit_bias(settings.openai_model)
+    if logit_bias:
+        params = {"max_tokens": 3, "logit_bias": logit_bias}
+    content = await cached_chat_completion(
         model=settings.openai_model,
         messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a document classifier. Classify the document into exactly ONE of: "
-                    "research_paper, news_article, blog_post, legal_document, unknown. "
-                    "Respond with ONLY the label, nothing else."
-                ),
-            },
+            {"role": "system", "content": "Classify the document. Reply with one label: " + ", ".join(DOC_TYPES)},
             {"role": "user", "content": sample},
         ],
         temperature=0,
-        max_tokens=10,
+        **params,
     )
-    label = resp.choices[0].message.content.strip().lower()
-    return label if label in DOC_TYPES else "unknown"
+    label = content.strip().lower()
+    if label in DOC_TYPES:
+        return label
+    return _LABEL_BY_HEAD.get(label.split("_")[0], "unknown")
 
 
 def _simple_hint(text: str) -> str | None:
@@ -144,8 +215,8 @@ def _simple_hint(text: str) -> str | None:
     t = text.lower()
     if "abstract" in t and "introduction" in t:
         return "research_paper"
-    if re.search(r"\bwhereas\b|\bhereinafter\b|\bpursuant to\b", t):
+    if _LEGAL_HINT_RE.search(t):
         return "legal_document"
-    if re.search(r"\bby [A-Z][a-z]+ [A-Z][a-z]+\b", text):
+    if _BYLINE_HINT_RE.search(text):
         return "news_article"
     return None
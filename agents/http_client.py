@@ -0,0 +1,31 @@
+"""
+Process-wide httpx client for outbound metadata lookups (Semantic Scholar,
+OpenPageRank).
+
+One pooled, HTTP/2-capable `AsyncClient` is reused across requests and
+orchestrator runs instead of paying a TCP+TLS handshake per call. The API
+lifespan closes it on shutdown.
+"""
+from __future__ import annotations
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, created on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=10,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -8,12 +8,15 @@ Credibility signals:
 """
 from __future__ import annotations
 import re
-import json
+import orjson
 import math
-from datetime import datetime, timezone
-from agents.base_agent import DocumentAgent
+from functools import lru_cache
+from datetime import datetime
+from agents.base_agent import DocumentAgent, first_sentences, scan_window, scoring_now
+from agents.source_authority import url_host
 from db.models import DocumentRecord, CredibilityScore, Claim
 from config import settings
+from agents.llm_cache import cached_chat_completion
 
 JURISDICTION_SCORES = {
     "supreme court": 1.0, "court of appeals": 0.88, "district court": 0.80,
@@ -21,51 +24,70 @@ JURISDICTION_SCORES = {
     "us": 0.85, "eu": 0.82, "uk": 0.80,
 }
 
+# Zero-width lookahead so every start position is tried (overlapping keywords
+# all count, like the old `kw in text.lower()` loop); higher scores are listed
+# first so they win when two keywords start at the same position.
+_JURISDICTION_RE = re.compile(
+    "(?=("
+    + "|".join(re.escape(k) for k in sorted(JURISDICTION_SCORES, key=JURISDICTION_SCORES.get, reverse=True))
+    + "))",
+    re.IGNORECASE,
+)
+_MAX_JURISDICTION_SCORE = max(JURISDICTION_SCORES.values())
+
 GOV_DOMAINS = [".gov", ".gov.uk", ".europa.eu", ".un.org", ".court"]
 
+_STATUTE_PATTERNS: list[re.Pattern] = [
+    re.compile(r"\b\d+\s+U\.?S\.?C\.?\s+§\s*\d+"),          # US Code
+    re.compile(r"\bPub\.?\s*L\.?\s+\d+-\d+"),                  # Public Law
+    re.compile(r"\b\d+\s+C\.?F\.?R\.?\s+§\s*\d+"),            # CFR
+    re.compile(r"\bArticle\s+\d+\b"),
+    re.compile(r"\b(?:Section|§)\s+\d+"),
+]
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+_CLAUSE_SPLIT_RE = re.compile(r"(?<=[.;])\s+")
+
 
 def _official_source_score(url: str | None) -> float:
     if not url:
         return 0.4
-    url_lower = url.lower()
+    return _official_score_for_host(url_host(url))
+
+
+@lru_cache(maxsize=4096)
+def _official_score_for_host(host: str) -> float:
+    dotted = f".{host}"
     for domain in GOV_DOMAINS:
-        if domain in url_lower:
+        if domain in dotted:
             return 1.0
     return 0.45
 
 
 def _jurisdiction_score(text: str) -> float:
-    text_lower = text.lower()
     best = 0.5
-    for keyword, score in JURISDICTION_SCORES.items():
-        if keyword in text_lower:
-            best = max(best, score)
+    for m in _JURISDICTION_RE.finditer(text):
+        best = max(best, JURISDICTION_SCORES[m.group(1).lower()])
+        if best == _MAX_JURISDICTION_SCORE:
+            break
     return best
 
 
 def _statute_score(text: str) -> float:
-    patterns = [
-        r"\b\d+\s+U\.?S\.?C\.?\s+§\s*\d+",          # US Code
-        r"\bPub\.?\s*L\.?\s+\d+-\d+",                  # Public Law
-        r"\b\d+\s+C\.?F\.?R\.?\s+§\s*\d+",            # CFR
-        r"\bArticle\s+\d+\b",
-        r"\b(?:Section|§)\s+\d+",
-    ]
-    found = sum(1 for p in patterns if re.search(p, text))
+    found = sum(1 for p in _STATUTE_PATTERNS if p.search(text))
     return min(found * 0.2, 1.0) if found else 0.25
 
 
 def _recency_score(text: str, published_date: str | None) -> float:
     if not published_date:
-        year_match = re.search(r"\b(19|20)\d{2}\b", text)
+        year_match = _YEAR_RE.search(text)
         if year_match:
             year = int(year_match.group())
-            age = max(datetime.now(timezone.utc).year - year, 0)
+            age = max(scoring_now().year - year, 0)
             return max(0.2, math.exp(-age / 15))  # 15yr half-life for legal
         return 0.5
     try:
         date = datetime.fromisoformat(published_date.replace("Z", "+00:00"))
-        age_years = (datetime.now(timezone.utc) - date).days / 365
+        age_years = (scoring_now() - date).days / 365
         return max(0.2, math.exp(-age_years / 15))
     except Exception:
         return 0.5
@@ -73,15 +95,21 @@ def _recency_score(text: str, published_date: str | None) -> float:
 
 class LegalAgent(DocumentAgent):
     doc_type = "legal_document"
+    claims_pack_instructions = "Extract 5–8 key legal provisions or findings from each document."
+    claims_pack_max_chars = 4000
+    recency_decay = (15 * 365, 0.2)
 
     async def score_credibility(self, doc: DocumentRecord) -> CredibilityScore:
         url = doc.source_url
         published_date = doc.metadata.get("published_date")
 
         official = _official_source_score(url)
-        jurisdiction = _jurisdiction_score(doc.raw_text)
-        statute = _statute_score(doc.raw_text)
-        recency = _recency_score(doc.raw_text, published_date)
+        scanned = scan_window(doc.raw_text)
+        jurisdiction = _jurisdiction_score(scanned)
+        statute = _statute_score(scanned)
+        recency = self.batch_recency(doc)
+        if recency is None:
+            recency = _recency_score(scanned, published_date)
 
         overall = (
             0.35 * official
@@ -125,11 +153,9 @@ class LegalAgent(DocumentAgent):
 
     async def extract_claims(self, doc: DocumentRecord) -> list[Claim]:
         if not settings.openai_api_key:
-            sentences = re.split(r"(?<=[.;])\s+", doc.raw_text)
-            return [Claim(text=s.strip(), source_doc_id=doc.doc_id) for s in sentences[:8] if len(s.strip()) > 40]
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        resp = await client.chat.completions.create(
+            sentences = first_sentences(doc.raw_text, _CLAUSE_SPLIT_RE, 8)
+            return [Claim.from_trusted(text=s, source_doc_id=doc.doc_id) for s in sentences]
+        content = await cached_chat_completion(
             model=settings.openai_model,
             messages=[
                 {"role": "system", "content": 'Extract 5–8 key legal provisions or findings. Return JSON: {"claims": [...]}'},
@@ -139,7 +165,7 @@ class LegalAgent(DocumentAgent):
             response_format={"type": "json_object"},
         )
         try:
-            data = json.loads(resp.choices[0].message.content)
-            return [Claim(text=t, source_doc_id=doc.doc_id) for t in data.get("claims", []) if isinstance(t, str)]
+            data = orjson.loads(content)
+            return [Claim.from_trusted(text=t, source_doc_id=doc.doc_id) for t in data.get("claims", []) if isinstance(t, str)]
         except Exception:
             return []
@@ -0,0 +1,96 @@
+"""
+Content-hash cache for deterministic LLM calls (temperature=0 classification,
+credibility and claim-extraction prompts).
+
+Lookup order: in-process LRU → MongoDB (LLMCacheEntry, TTL-expired) → network.
+Identical (model, messages, params) requests across jobs and re-runs skip the
+OpenAI round-trip entirely, and identical misses in flight at the same time
+share a single call. Mongo errors are swallowed — the cache is advisory.
+"""
+from __future__ import annotations
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from agents import openai_client
+from agents.batch_dispatcher import current_dispatcher
+from utils.inflight import Coalescer
+
+_MAX_MEMORY_ENTRIES = 2048
+_memory: OrderedDict[str, str] = OrderedDict()
+# Concurrent misses for the same request hash
+_coalescer: Coalescer[str] = Coalescer()
+
+
+def llm_cache_key(params: dict) -> str:
+    """sha256 over the canonical JSON of the request parameters."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _memory_get(key: str) -> str | None:
+    value = _memory.get(key)
+    if value is not None:
+        _memory.move_to_end(key)
+    return value
+
+
+def _memory_set(key: str, value: str) -> None:
+    _memory[key] = value
+    _memory.move_to_end(key)
+    while len(_memory) > _MAX_MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+async def _store_get(key: str) -> str | None:
+    try:
+        from db.models import LLMCacheEntry
+        entry = await LLMCacheEntry.find_one(LLMCacheEntry.key == key)
+        return entry.value if entry else None
+    except Exception:
+        return None
+
+
+async def _store_set(key: str, value: str) -> None:
+    try:
+        from db.models import LLMCacheEntry
+        await LLMCacheEntry(key=key, value=value).insert()
+    except Exception:
+        pass
+
+
+async def cached_llm(key: str, factory: Callable[[], Awaitable[str]]) -> str:
+    """Return the cached value for `key`, or await `factory()` and cache its result."""
+    value = _memory_get(key)
+    if value is not None:
+        return value
+    value = await _store_get(key)
+    if value is not None:
+        _memory_set(key, value)
+        return value
+
+    async def _fetch() -> str:
+        fresh = await factory()
+        _memory_set(key, fresh)
+        await _store_set(key, fresh)
+        return fresh
+
+    # Concurrent misses for the same key share one request
+    return await _coalescer.run(key, _fetch)
+
+
+async def cached_chat_completion(**params) -> str:
+    """
+    `chat.completions.create(**params)` on the shared client → message content,
+    cached by request hash. Cache misses are queued on the Batch API when a
+    dispatcher is active.
+    """
+
+    async def _create() -> str:
+        dispatcher = current_dispatcher()
+        if dispatcher is not None:
+            return await dispatcher.submit(params)
+        resp = await openai_client.chat(**params)
+        return resp.choices[0].message.content or ""
+
+    return await cached_llm(llm_cache_key(params), _create)
@@ -0,0 +1,129 @@
+"""
+Process-wide OpenAI client.
+
+One `AsyncOpenAI` (and so one pooled HTTP/2 httpx client / TLS session) is shared by
+every agent and the RAG summarizer instead of being rebuilt per call, and a global semaphore bounds how many
+chat completions are in flight at once (`settings.openai_max_concurrency`).
+
+Before each attempt a request also waits for room in the process-wide RPM/TPM
+budget (utils/rate_limiter.py). Completions made outside `chat` — the RAG
+summarizer's streamed summary — take the same budget and slot through
+`completion_slot`, so every chat completion on the key is metered. Embedding
+calls are not: OpenAI limits them per embedding model, separately.
+
+Transient failures (429, timeouts, connection drops, 5xx) are retried with
+jittered exponential backoff before the caller's own fallback kicks in. The
+semaphore is only held during an attempt, never while backing off.
+"""
+from __future__ import annotations
+import asyncio
+import contextlib
+import logging
+from typing import AsyncIterator
+import httpx
+from openai import (
+    AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError,
+)
+from tenacity import (
+    retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential,
+)
+from config import settings
+from utils.paper_chunker import count_tokens
+from utils.rate_limiter import openai_limiter
+
+_client: AsyncOpenAI | None = None
+_sem: asyncio.Semaphore | None = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_client() -> AsyncOpenAI:
+    """The shared client, created on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            max_retries=0,  # retries are handled by `chat` below
+            http_client=httpx.AsyncClient(
+                http2=True,  # concurrent chat + embedding calls multiplex on one connection
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_concurrency * 2,
+                    max_keepalive_connections=settings.openai_max_concurrency,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client's connection pool (app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _semaphore() -> asyncio.Semaphore:
+    global _sem
+    if _sem is None:
+        _sem = asyncio.Semaphore(settings.openai_max_concurrency)
+    return _sem
+
+
+_retryable = retry_if_exception_type(
+    (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+)
+
+
+def _should_retry(retry_state) -> bool:
+    exc = retry_state.outcome.exception()
+    if exc is not None:
+        # Every failed attempt passes through here, retried or not: the error
+        # that escapes `chat` records how many attempts it took
+        exc.chat_attempts = retry_state.attempt_number
+    return _retryable(retry_state)
+
+
+def _log_retry(retry_state) -> None:
+    logger.warning(
+        "Chat completion attempt %d failed (%r); retrying",
+        retry_state.attempt_number, retry_state.outcome.exception(),
+    )
+
+
+@retry(
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(3),
+    retry=_should_retry,
+    before_sleep=_log_retry,
+    reraise=True,
+)
+async def chat(*, client: AsyncOpenAI | None = None, **kwargs):
+    """`chat.completions.create` on `client` (the shared client by default),
+    within the rate-limit budget and bounded by the global semaphore. An error
+    it raises carries the attempts made as `chat_attempts`."""
+    async with completion_slot(kwargs):
+        return await (client or get_client()).chat.completions.create(**kwargs)
+
+
+@contextlib.asynccontextmanager
+async def completion_slot(params: dict) -> AsyncIterator[None]:
+    """Charge the chat completion `params` to the rate-limit budget, then hold
+    a global concurrency slot for the block — for a streamed completion, wrap
+    the whole read of the stream."""
+    limiter = openai_limiter()
+    if limiter is not None:
+        # Waits outside the semaphore: no slot is held while out of budget
+        await limiter.acquire(_request_tokens(params))
+    async with _semaphore():
+        yield
+
+
+def _request_tokens(kwargs: dict) -> int:
+    """What OpenAI charges against TPM: prompt + max_tokens."""
+    prompt = sum(
+        count_tokens(m["content"]) for m in kwargs.get("messages", ())
+        if isinstance(m.get("content"), str)
+    )
+    return prompt + (kwargs.get("max_tokens") or 0)
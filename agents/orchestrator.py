@@ -5,12 +5,20 @@ Supports single-doc jobs (skips conflict resolution) and summary depth levels.
 """
 from __future__ import annotations
 import asyncio
+import contextlib
+import logging
 from datetime import datetime, timezone
 from db.models import DocumentRecord, SummaryJob, SummaryReport
 from agents.classifier import classify_document
+from agents.base_agent import freeze_now
+from agents.batch_dispatcher import batch_mode
+from config import settings
 from conflict.resolver import resolve_conflicts
 from summarizer.factory import get_summarizer
 from summarizer.rag_summarizer import RAGSummarizer
+from utils.passage_index import index_passages
+
+logger = logging.getLogger(__name__)
 
 
 def _get_agent_for_type(doc_type: str):
@@ -31,47 +39,141 @@ def _get_agent_for_type(doc_type: str):
         return NewsAgent()
 
 
+# raw_text byte budget per document, leaving headroom under the 16 MB BSON limit
+# for claims, metadata and the credibility breakdown
+_MAX_TEXT_BYTES = 15_500_000
+
+
+def _cap_for_storage(text: str) -> str:
+    """Truncate `text` to `_MAX_TEXT_BYTES` of UTF-8, only encoding when it could be over."""
+    if len(text) * 4 <= _MAX_TEXT_BYTES:  # ≤ 4 bytes per char: can't exceed the budget
+        return text
+    encoded = text.encode("utf-8")
+    if len(encoded) <= _MAX_TEXT_BYTES:
+        return text
+    return str(memoryview(encoded)[:_MAX_TEXT_BYTES], "utf-8", "ignore") + "\n\n[... truncated for storage ...]"
+
+
+def _error_message(exc: BaseException) -> str:
+    """Message for `job.error`, flattening TaskGroup failures to their causes."""
+    if isinstance(exc, BaseExceptionGroup):
+        return "; ".join(_error_message(e) for e in exc.exceptions)
+    return str(exc)
+
+
 class Orchestrator:
     """
     Stateless orchestrator — runs the full pipeline for a SummaryJob.
     Can be called from a FastAPI background task.
     Supports single-doc jobs (skips conflict resolution) and summary depth levels.
+
+    With `batch_mode` on, jobs of at least `settings.openai_batch_min_docs` documents
+    send their per-doc LLM calls through the OpenAI Batch API (cheaper, slower).
     """
 
+    def __init__(self, batch_mode: bool | None = None):
+        self.batch_mode = settings.openai_batch_mode if batch_mode is None else batch_mode
+
+    def _batch_context(self, docs: list[DocumentRecord]):
+        if not (self.batch_mode and settings.openai_api_key and len(docs) >= settings.openai_batch_min_docs):
+            return contextlib.nullcontext()
+        from agents.openai_client import get_client
+        return batch_mode(get_client())
+
+    @contextlib.asynccontextmanager
+    async def _scoring_context(self, docs: list[DocumentRecord], now: datetime):
+        """One frozen recency clock (and optional Batch API routing) per run."""
+        with freeze_now(now):
+            async with self._batch_context(docs):
+                yield
+
+    async def _classify_and_process(self, docs: list[DocumentRecord]) -> None:
+        """
+        Two-stage pipeline joined by a bounded queue: classifiers push each doc
+        as soon as its label is known, and the processor drains whatever is
+        queued into same-type `process_batch` calls. Keyword-confident docs
+        arrive together and still get batched; docs that needed the LLM
+        fallback follow as their labels come in. When processing is saturated
+        the queue fills and classification waits, bounding work in flight.
+        """
+        if len(docs) == 1:
+            # Single-doc jobs (the common UI case): no queue, no batching
+            doc = docs[0]
+            doc.doc_type = await classify_document(doc.raw_text, doc.title or "")  # type: ignore[assignment]
+            await _get_agent_for_type(doc.doc_type).process(doc)
+            return
+
+        limit = settings.orchestrator_max_concurrency
+        classify_sem = asyncio.Semaphore(limit)
+        process_sem = asyncio.Semaphore(limit)
+        queue: asyncio.Queue[DocumentRecord | None] = asyncio.Queue(maxsize=limit)
+
+        async def _classify(doc: DocumentRecord) -> None:
+            async with classify_sem:
+                doc.doc_type = await classify_document(doc.raw_text, doc.title or "")  # type: ignore[assignment]
+            await queue.put(doc)
+
+        async def _classify_all() -> None:
+            async with asyncio.TaskGroup() as classifiers:
+                for doc in docs:
+                    classifiers.create_task(_classify(doc))
+            await queue.put(None)  # end of stream
+
+        async def _process(doc_type: str, group: list[DocumentRecord]) -> None:
+            try:
+                await _get_agent_for_type(doc_type).process_batch(group)
+            finally:
+                process_sem.release()
+
+        # A failure anywhere cancels both stages and every in-flight batch
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(_classify_all())
+            finished = False
+            while not finished:
+                ready = [await queue.get()]
+                while not queue.empty():
+                    ready.append(queue.get_nowait())
+                by_type: dict[str, list[DocumentRecord]] = {}
+                for doc in ready:
+                    if doc is None:
+                        finished = True
+                    else:
+                        by_type.setdefault(doc.doc_type, []).append(doc)
+                for doc_type, group in by_type.items():
+                    await process_sem.acquire()
+                    tg.create_task(_process(doc_type, group))
+
     async def run(self, job: SummaryJob, docs: list[DocumentRecord]) -> SummaryReport:
         # ── Step 1: Mark job running ─────────────────────────────────────────
+        started = datetime.now(timezone.utc)
         job.status = "running"
-        job.updated_at = datetime.now(timezone.utc)
+        job.updated_at = started
         await job.save()
 
         try:
-            # ── Step 2: Classify each document ───────────────────────────────
-            classify_tasks = [
-                classify_document(doc.raw_text, doc.title or "")
-                for doc in docs
-            ]
-            doc_types = await asyncio.gather(*classify_tasks)
-
-            for doc, dt in zip(docs, doc_types):
-                doc.doc_type = dt  # type: ignore[assignment]
-
-            # ── Step 3: Score credibility + extract claims (type-specific) ───
-            process_tasks = []
-            for doc in docs:
-                agent = _get_agent_for_type(doc.doc_type)
-                process_tasks.append(agent.process(doc))
+            # Docs are aged against the job's start time
+            async with self._scoring_context(docs, started):
+                # ── Steps 2+3: Classify, then score + extract claims ─────────
+                await self._classify_and_process(docs)
 
-            processed_docs: list[DocumentRecord] = list(await asyncio.gather(*process_tasks))
+                processed_docs: list[DocumentRecord] = list(docs)
 
             # ── Cap raw_text before MongoDB save (16 MB BSON limit) ──────────
-            _MAX_CHARS = 400_000  # ~100k words — safely under 16 MB
             for doc in processed_docs:
                 condensed = doc.metadata.get("condensed_text")
                 if condensed:
                     doc.raw_text = condensed
-                elif len(doc.raw_text) > _MAX_CHARS:
-                    doc.raw_text = doc.raw_text[:_MAX_CHARS] + "\n\n[... truncated for storage ...]"
-                await doc.save()
+                else:
+                    doc.raw_text = _cap_for_storage(doc.raw_text)
+            # /qa retrieval index over the stored text; /qa falls back to text
+            # prefixes if the embedding model can't be loaded
+            try:
+                await asyncio.to_thread(index_passages, processed_docs)
+            except Exception:
+                logger.exception("Passage indexing failed for job %s; /qa will use text prefixes", job.id)
+            async with asyncio.TaskGroup() as tg:
+                for doc in processed_docs:
+                    tg.create_task(doc.save())
 
             # ── Step 4: Conflict resolution (skipped for single-doc) ─────────
             is_single_doc = len(processed_docs) == 1
@@ -88,7 +190,7 @@ class Orchestrator:
             summary_depth = getattr(job, "summary_depth", "standard")
             summarizer = get_summarizer()
             if isinstance(summarizer, RAGSummarizer):
-                summarizer.build_index(processed_docs)
+                await summarizer.build_index_async(processed_docs)
 
             unique_types = list({d.doc_type for d in processed_docs})
             full_summary, sections = await summarizer.summarize(
@@ -119,7 +221,7 @@ class Orchestrator:
 
         except Exception as exc:
             job.status = "failed"
-            job.error = str(exc)
+            job.error = _error_message(exc)
             job.updated_at = datetime.now(timezone.utc)
             await job.save()
             raise
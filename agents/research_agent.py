@@ -11,15 +11,20 @@ When Semantic Scholar returns no data (policy reports, org publications):
   source authority is weighted at 60%, recency at 40% — no academic penalty.
 """
 from __future__ import annotations
-import json
+import hashlib
 import math
 import re
-import httpx
+import asyncio
+import ahocorasick
+import numpy as np
+import orjson
 from pathlib import Path
-from datetime import datetime, timezone
-from agents.base_agent import DocumentAgent
+from agents.base_agent import DocumentAgent, first_sentences, scoring_now
 from db.models import DocumentRecord, CredibilityScore, Claim
 from config import settings
+from agents.llm_cache import cached_chat_completion
+from agents.openai_client import get_client
+from agents.http_client import get_http_client
 
 # Rough venue tier → normalised score (0–1)
 VENUE_TIER: dict[str, float] = {
@@ -31,76 +36,180 @@ VENUE_TIER: dict[str, float] = {
 
 SEMANTIC_SCHOLAR_BASE = "https://api.semanticscholar.org/graph/v1"
 
-from agents.source_authority import get_source_authority
-from utils.hierarchical_summarizer import hierarchical_summarize, keyword_section_summary
+from utils.hierarchical_summarizer import fits_single_pass, hierarchical_summarize, keyword_section_summary
+from utils.cpu_pool import run_text_job
 
 
 # ── Semantic Scholar ──────────────────────────────────────────────────────────
 
+_WS_RE = re.compile(r"\s+")
+_QUERY_JUNK_RE = re.compile(r"[^\w\s:\-]")
+_MAX_QUERY_CHARS = 160
+
+
+def _normalize_title(title: str) -> str:
+    """S2 search query: punctuation stripped (except ':' and '-'), whitespace collapsed, capped at 160 chars."""
+    query = _WS_RE.sub(" ", _QUERY_JUNK_RE.sub("", title)).strip()
+    return query[:_MAX_QUERY_CHARS].rstrip()
+
+
+def _paper_cache_key(query: str) -> str:
+    """sha1 of the lowercased normalised query."""
+    return hashlib.sha1(query.lower().encode("utf-8")).hexdigest()
+
+
+async def _paper_cache_get(key: str) -> dict | None:
+    try:
+        from db.models import PaperMetaCache
+        entry = await PaperMetaCache.find_one(PaperMetaCache.key == key)
+        return entry.meta if entry else None
+    except Exception:
+        return None
+
+
+async def _paper_cache_set(key: str, meta: dict) -> None:
+    try:
+        from db.models import PaperMetaCache
+        await PaperMetaCache(key=key, meta=meta).insert()
+    except Exception:
+        pass
+
+
 async def _fetch_paper_meta(title: str) -> dict:
-    """Hit Semantic Scholar to get citations, year, venue, authors."""
+    """Hit Semantic Scholar to get citations, year, venue, authors (cached per title)."""
+    query = _normalize_title(title)
+    if not query:
+        return {}
+    key = _paper_cache_key(query)
+    cached = await _paper_cache_get(key)
+    if cached is not None:
+        return cached
     headers = {}
     if settings.semantic_scholar_key:
         headers["x-api-key"] = settings.semantic_scholar_key
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(
-                f"{SEMANTIC_SCHOLAR_BASE}/paper/search",
-                params={
-                    "query": title,
-                    "limit": 1,
-                    "fields": "citationCount,year,venue,authors.hIndex,isOpenAccess,publicationTypes",
-                },
-                headers=headers,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            papers = data.get("data", [])
-            return papers[0] if papers else {}
+        resp = await get_http_client().get(
+            f"{SEMANTIC_SCHOLAR_BASE}/paper/search",
+            params={
+                "query": query,
+                "limit": 1,
+                "fields": "citationCount,year,venue,authors.hIndex,isOpenAccess,publicationTypes",
+            },
+            headers=headers,
+            timeout=10,
+        )
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+        papers = data.get("data", [])
+        meta = papers[0] if papers else {}
     except Exception:
-        return {}
+        return {}  # transient failure — not cached, so the next run retries
+    await _paper_cache_set(key, meta)
+    return meta
 
 
 # ── Sub-scores ────────────────────────────────────────────────────────────────
 
+_LOG1P_5000 = math.log1p(5000)
+_HALFLIFE_K = math.log(2) / 5  # 5-year half-life
+
+
 def _recency_score(year: int | None) -> float:
     if not year:
         return 0.5
-    age = max(datetime.now(timezone.utc).year - year, 0)
-    return math.exp(-math.log(2) * age / 5)
+    age = max(scoring_now().year - year, 0)
+    return math.exp(-_HALFLIFE_K * age)
 
 
 def _citation_score(count: int | None) -> float:
     if count is None:
         return 0.0   # unknown — don't assume anything
-    return min(math.log1p(count) / math.log1p(5000), 1.0)
+    return min(math.log1p(count) / _LOG1P_5000, 1.0)
+
+
+def _build_venue_automaton() -> ahocorasick.Automaton:
+    """VENUE_TIER keys → (dict position, score); the earliest-listed hit wins, as before."""
+    automaton = ahocorasick.Automaton()
+    for idx, (key, score) in enumerate(VENUE_TIER.items()):
+        automaton.add_word(key, (idx, score))
+    automaton.make_automaton()
+    return automaton
+
+
+_VENUE_AC = _build_venue_automaton()
 
 
 def _venue_score(venue: str) -> float:
     if not venue:
         return 0.0   # unknown venue — don't assume anything
-    v = venue.lower()
-    for key, score in VENUE_TIER.items():
-        if key in v:
-            return score
-    return 0.55
+    hit = min((entry for _, entry in _VENUE_AC.iter(venue.lower())), default=None)
+    return hit[1] if hit is not None else 0.55
 
 
-def _hindex_score(authors: list) -> float:
-    indices = [a.get("hIndex", 0) for a in authors if isinstance(a, dict)]
-    if not indices:
+def _max_hindex(authors: list) -> int | None:
+    indices = [a.get("hIndex") or 0 for a in authors if isinstance(a, dict)]
+    return max(indices) if indices else None
+
+
+def _hindex_from_max(top: int | None) -> float:
+    if top is None:
         return 0.0   # unknown — don't penalise but don't boost
-    return min(max(indices) / 60, 1.0)
+    return min(top / 60, 1.0)
+
+
+def _hindex_score(authors: list) -> float:
+    return _hindex_from_max(_max_hindex(authors))
+
+
+def score_many(metas: list[dict]) -> list[dict[str, float]]:
+    """
+    Recency, citation and h-index sub-scores for a batch of Semantic Scholar
+    records in one vectorised pass; identical to the scalar helpers above.
+    """
+    if not metas:
+        return []
+    nan = float("nan")
+    years = np.array([m.get("year") or nan for m in metas], dtype=float)
+    citations = np.array([nan if m.get("citationCount") is None else m["citationCount"] for m in metas], dtype=float)
+    tops = [_max_hindex(m.get("authors", [])) for m in metas]
+    hindex = np.array([nan if t is None else t for t in tops], dtype=float)
+
+    ages = np.clip(scoring_now().year - years, 0, None)
+    recency = np.where(np.isnan(years), 0.5, np.exp(-_HALFLIFE_K * ages))
+    citation = np.where(np.isnan(citations), 0.0, np.minimum(np.log1p(citations) / _LOG1P_5000, 1.0))
+    hindex_s = np.where(np.isnan(hindex), 0.0, np.minimum(hindex / 60, 1.0))
+    return [
+        {"recency": float(r), "citation": float(c), "hindex": float(h)}
+        for r, c, h in zip(recency, citation, hindex_s)
+    ]
 
 
 # ── Main agent ────────────────────────────────────────────────────────────────
 
 class ResearchAgent(DocumentAgent):
     doc_type = "research_paper"
+    uses_source_authority = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._batch_meta: dict[str, tuple[dict, dict[str, float]]] = {}
+
+    async def prepare_batch(self, docs: list[DocumentRecord]) -> None:
+        """Fetch S2 metadata for the whole batch and score it in one vectorised pass."""
+        _, metas = await asyncio.gather(
+            super().prepare_batch(docs),
+            asyncio.gather(*(_fetch_paper_meta(doc.title or doc.raw_text[:200]) for doc in docs)),
+        )
+        self._batch_meta = {
+            doc.doc_id: (meta, subs) for doc, meta, subs in zip(docs, metas, score_many(metas))
+        }
 
     async def score_credibility(self, doc: DocumentRecord) -> CredibilityScore:
-        title = doc.title or doc.raw_text[:200]
-        meta = await _fetch_paper_meta(title)
+        if doc.doc_id in self._batch_meta:
+            meta, subs = self._batch_meta[doc.doc_id]
+        else:
+            meta = await _fetch_paper_meta(doc.title or doc.raw_text[:200])
+            subs = None
 
         citations = meta.get("citationCount")
         year = meta.get("year")
@@ -112,11 +221,15 @@ class ResearchAgent(DocumentAgent):
         ) or ("journal" in venue.lower())
 
         # Sub-scores
-        recency   = _recency_score(year)
-        citation  = _citation_score(citations)
+        max_h = _max_hindex(authors)
+        if subs is not None:
+            recency, citation, hindex = subs["recency"], subs["citation"], subs["hindex"]
+        else:
+            recency  = _recency_score(year)
+            citation = _citation_score(citations)
+            hindex   = _hindex_from_max(max_h)
         venue_s   = _venue_score(venue)
-        hindex    = _hindex_score(authors)
-        authority = await get_source_authority(doc.source_url)
+        authority = await self.source_authority(doc)
 
         # Determine whether we have useful academic signals
         has_academic_data = bool(meta)  # Semantic Scholar returned something
@@ -143,7 +256,7 @@ class ResearchAgent(DocumentAgent):
                 "venue_tier": f"Published in '{venue or 'unknown venue'}' — {'top-tier peer-reviewed venue' if venue_s >= 0.85 else 'mid-tier or preprint venue' if venue_s >= 0.5 else 'unknown or low-tier venue'}",
                 "citation_count": f"{citations if citations is not None else 'unknown'} citation{'s' if citations != 1 else ''} — {'highly cited' if citation >= 0.7 else 'moderately cited' if citation >= 0.3 else 'few or no citations found'}",
                 "recency": f"Published in {year or 'unknown year'} — {'very recent' if recency >= 0.85 else 'fairly recent' if recency >= 0.6 else 'older work'} (5-year half-life decay applied)",
-                "author_hindex": f"Lead author h-index: {max([a.get('hIndex', 0) for a in authors if isinstance(a, dict)], default=0)} — {'highly prolific researcher' if hindex >= 0.6 else 'established researcher' if hindex >= 0.3 else 'limited publication history found'}",
+                "author_hindex": f"Lead author h-index: {max_h or 0} — {'highly prolific researcher' if hindex >= 0.6 else 'established researcher' if hindex >= 0.3 else 'limited publication history found'}",
             }
         else:
             # No academic data (policy report, org publication, etc.)
@@ -195,24 +308,25 @@ class ResearchAgent(DocumentAgent):
         return await _extract_claims_hierarchical(doc)
 
 
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+
 async def _extract_claims_hierarchical(doc: DocumentRecord) -> list[Claim]:
     """
     For research papers: condense the full paper section-by-section first,
     then extract claims from the condensed text.
     Ensures coverage of Methods, Results, and Conclusion — not just the abstract.
     """
-    word_count = len(doc.raw_text.split())
-    is_long = word_count > 1500  # ~6+ pages
+    # Papers that fit one claim-extraction context are used as they are
+    is_long = not fits_single_pass(doc.raw_text)
 
     if not settings.openai_api_key:
-        condensed = keyword_section_summary(doc.raw_text)
+        condensed = await run_text_job(keyword_section_summary, doc.raw_text)
         doc.metadata["condensed_text"] = condensed
         doc.metadata["hierarchical"] = True
         return _fallback_sentence_claims(doc, text_override=condensed)
 
-    from openai import AsyncOpenAI
-    import json as _json
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_client()
 
     # Step 1: condense the full paper into section summaries
     if is_long:
@@ -220,7 +334,7 @@ async def _extract_claims_hierarchical(doc: DocumentRecord) -> list[Claim]:
             doc.raw_text, client, model=settings.openai_model
         )
         condensed = result["condensed_text"]
-        doc.metadata["hierarchical"] = True
+        doc.metadata["hierarchical"] = result["was_hierarchical"]
         doc.metadata["section_count"] = result["section_count"]
         doc.metadata["condensed_word_count"] = len(condensed.split())
     else:
@@ -231,7 +345,7 @@ async def _extract_claims_hierarchical(doc: DocumentRecord) -> list[Claim]:
     doc.metadata["condensed_text"] = condensed
 
     # Step 2: extract claims from the condensed section summaries
-    resp = await client.chat.completions.create(
+    raw = await cached_chat_completion(
         model=settings.openai_model,
         messages=[
             {
@@ -250,20 +364,17 @@ async def _extract_claims_hierarchical(doc: DocumentRecord) -> list[Claim]:
         max_tokens=800,
         response_format={"type": "json_object"},
     )
-    raw = resp.choices[0].message.content
     try:
-        data = _json.loads(raw)
+        data = orjson.loads(raw)
         texts = data.get("claims", data.get("results", list(data.values())[0]))
-        return [Claim(text=t, source_doc_id=doc.doc_id) for t in texts if isinstance(t, str)]
+        return [Claim.from_trusted(text=t, source_doc_id=doc.doc_id) for t in texts if isinstance(t, str)]
     except Exception:
         return _fallback_sentence_claims(doc, text_override=condensed)
 
 
 def _fallback_sentence_claims(doc: DocumentRecord, text_override: str | None = None) -> list[Claim]:
     text = text_override or doc.raw_text
-    sentences = re.split(r"(?<=[.!?])\s+", text)
     return [
-        Claim(text=s.strip(), source_doc_id=doc.doc_id)
-        for s in sentences[:10]
-        if len(s.strip()) > 40
+        Claim.from_trusted(text=s, source_doc_id=doc.doc_id)
+        for s in first_sentences(text, _SENTENCE_SPLIT_RE, 10)
     ]
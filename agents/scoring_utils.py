@@ -0,0 +1,27 @@
+"""Vectorised helpers for scoring many documents at once."""
+from __future__ import annotations
+from datetime import datetime
+import numpy as np
+
+
+def age_in_days(dates: list[str | None], now: datetime) -> np.ndarray:
+    """Whole days between each ISO date and `now`; NaN where missing or unparseable."""
+    ages = np.full(len(dates), np.nan)
+    for i, value in enumerate(dates):
+        if not value:
+            continue
+        try:
+            ages[i] = (now - datetime.fromisoformat(value.replace("Z", "+00:00"))).days
+        except Exception:
+            continue
+    return ages
+
+
+def recency_scores(
+    dates: list[str | None],
+    decay_days: float,
+    floor: float,
+    now: datetime,
+) -> np.ndarray:
+    """`max(floor, exp(-age_days / decay_days))` for every date in one pass; NaN where unknown."""
+    return np.maximum(floor, np.exp(-age_in_days(dates, now) / decay_days))
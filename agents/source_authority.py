@@ -10,17 +10,21 @@ only looked up once. The static DB acts as curated overrides for known
 biases (e.g. RT.com has high PageRank but is propaganda).
 """
 from __future__ import annotations
-import json
+import asyncio
 import re
 import math
-import httpx
+import orjson
+import tldextract
+from cachetools import TTLCache
+from functools import cache, lru_cache
 from pathlib import Path
 from urllib.parse import urlparse
 from config import settings
+from agents.http_client import get_http_client
+from utils.inflight import Coalescer
 
 # ── Static override DB (curated corrections) ─────────────────────────────────
 _STATIC_DB_PATH = Path(__file__).parent.parent / "data" / "news_trust_db.json"
-_static_db: dict[str, float] | None = None
 
 # Manual bias corrections: high-PR domains with known credibility issues
 _BIAS_CORRECTIONS = {
@@ -35,61 +39,81 @@ _BIAS_CORRECTIONS = {
 }
 
 
+@cache
 def _load_static_db() -> dict[str, float]:
-    global _static_db
-    if _static_db is not None:
-        return _static_db
+    """Static DB + bias corrections, loaded once per process."""
+    db: dict[str, float] = {}
     if _STATIC_DB_PATH.exists():
-        with open(_STATIC_DB_PATH) as f:
-            raw = json.load(f)
-        _static_db = {k: v for k, v in raw.items() if not k.startswith("_")}
-    else:
-        _static_db = {}
-    _static_db.update(_BIAS_CORRECTIONS)
-    return _static_db
+        raw = orjson.loads(_STATIC_DB_PATH.read_bytes())
+        db = {k: v for k, v in raw.items() if not k.startswith("_")}
+    db.update(_BIAS_CORRECTIONS)
+    return db
+
+
+def url_host(url: str) -> str:
+    """Lowercased hostname of `url` with any leading 'www.' removed."""
+    try:
+        host = urlparse(url if "//" in url else f"//{url}").hostname or ""
+    except ValueError:
+        return ""
+    return host.removeprefix("www.")
+
+
+def host_suffixes(host: str) -> list[str]:
+    """Domain suffixes of `host`, longest first: 'a.b.com' → ['a.b.com', 'b.com']."""
+    parts = host.split(".")
+    return [".".join(parts[i:]) for i in range(len(parts) - 1)]
+
+
+# Bundled Public Suffix List snapshot only: no network fetch, no disk cache
+_TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
 
 
 def _extract_domain(url: str) -> str:
     """Extract registrable domain from a URL, e.g. 'https://eaps.mit.edu/...' → 'mit.edu'."""
-    try:
-        host = urlparse(url).netloc.lower().lstrip("www.")
-        # return last 2 parts (handles sub.domain.com → domain.com)
-        # but keep 3 parts for known ccTLD combos like co.uk, gov.uk
-        parts = host.split(".")
-        if len(parts) >= 3 and parts[-2] in ("gov", "ac", "co", "edu", "org", "net"):
-            return ".".join(parts[-3:])
-        return ".".join(parts[-2:]) if len(parts) >= 2 else host
-    except Exception:
-        return url
+    ext = _TLD_EXTRACT(url or "")
+    if ext.domain and ext.suffix:
+        return f"{ext.domain}.{ext.suffix}"
+    return url_host(url) or url  # IPs, localhost, bare hostnames
 
 
 # ── Tier-1: TLD / pattern rules (zero cost) ──────────────────────────────────
 
-_TLD_PATTERNS: list[tuple[re.Pattern, float]] = [
-    (re.compile(r"\.gov(\/|$|\.)"),        0.93),
-    (re.compile(r"\.gov\.[a-z]{2}(\/|$)"), 0.92),
-    (re.compile(r"\.int(\/|$|\.)"),         0.94),
-    (re.compile(r"\.un\.org"),              0.97),
-    (re.compile(r"\.edu(\/|$|\.)"),         0.88),
-    (re.compile(r"\.edu\.[a-z]{2}(\/|$)"),  0.87),
-    (re.compile(r"\.ac\.[a-z]{2}(\/|$)"),   0.87),
-]
+# Anchored to the end of the hostname, so "foo.gov.example.com" is not a .gov site
+_TLD_RE = re.compile(
+    r"(?P<gov>\.gov$)"
+    r"|(?P<gov_cc>\.gov\.[a-z]{2}$)"
+    r"|(?P<int_>\.int$)"
+    r"|(?P<un>\.un\.org$)"
+    r"|(?P<edu>\.edu$)"
+    r"|(?P<edu_cc>\.edu\.[a-z]{2}$)"
+    r"|(?P<ac_cc>\.ac\.[a-z]{2}$)"
+)
+_TLD_SCORES: dict[str, float] = {
+    "gov": 0.93, "gov_cc": 0.92, "int_": 0.94, "un": 0.97,
+    "edu": 0.88, "edu_cc": 0.87, "ac_cc": 0.87,
+}
 
 _KNOWN_ADVOCACY_TLDS = re.compile(r"\.(advocacy|campaign)\.")
 
 
 def _tier1_lookup(url: str) -> float | None:
     """TLD/pattern check — instant, covers .gov/.edu/.int etc."""
+    return _tier1_for_host(url_host(url))
+
+
+@lru_cache(maxsize=4096)
+def _tier1_for_host(host: str) -> float | None:
     db = _load_static_db()
-    # Check static DB first (highest priority — includes bias corrections)
-    for domain, score in db.items():
-        if domain in url:
+    # Static DB first (highest priority — includes bias corrections): exact
+    # match on the host, then each parent domain
+    for suffix in host_suffixes(host):
+        score = db.get(suffix)
+        if score is not None:
             return score
     # Pattern-based TLD matching
-    for pattern, score in _TLD_PATTERNS:
-        if pattern.search(url):
-            return score
-    return None
+    m = _TLD_RE.search(f".{host}")
+    return _TLD_SCORES[m.lastgroup] if m else None
 
 
 # ── Tier-2: OpenPageRank API (free, no auth needed) ──────────────────────────
@@ -97,6 +121,14 @@ def _tier1_lookup(url: str) -> float | None:
 OPEN_PR_API = "https://openpagerank.com/api/v1.0/getPageRank"
 
 
+def _normalise_pagerank(pr_score: float) -> float:
+    # Calibrated normalisation: sigmoid-like curve anchored at real examples
+    # PR=9 (google.com) → ~0.90, PR=7 (medium-sized news) → ~0.72,
+    # PR=5 (small news) → ~0.58, PR=2 → ~0.38
+    normalised = 0.20 + 0.70 * (1 - math.exp(-0.35 * float(pr_score)))
+    return round(normalised, 4)
+
+
 async def _tier2_openpagerank(domain: str) -> float | None:
     """
     OpenPageRank returns a 0-10 domain authority score.
@@ -106,30 +138,42 @@ async def _tier2_openpagerank(domain: str) -> float | None:
     - Score 2-4: small/niche sites    → 0.35-0.54
     - Score 0-1: very small/unknown   → 0.20-0.34
     """
-    try:
-        async with httpx.AsyncClient(timeout=8) as client:
-            resp = await client.get(
+    return (await _tier2_openpagerank_many([domain])).get(domain)
+
+
+# OpenPageRank accepts up to 100 domains per request
+_OPR_MAX_DOMAINS = 100
+
+
+async def _tier2_openpagerank_many(domains: list[str]) -> dict[str, float]:
+    """`_tier2_openpagerank` for many domains, one request per 100."""
+    headers = {"API-OPR": settings.open_pagerank_key} if getattr(settings, "open_pagerank_key", "") else {}
+    scores: dict[str, float] = {}
+    for i in range(0, len(domains), _OPR_MAX_DOMAINS):
+        chunk = domains[i: i + _OPR_MAX_DOMAINS]
+        try:
+            resp = await get_http_client().get(
                 OPEN_PR_API,
-                params={"domains[]": domain},
-                headers={"API-OPR": settings.open_pagerank_key} if getattr(settings, "open_pagerank_key", "") else {},
+                params=[("domains[]", d) for d in chunk],
+                headers=headers,
+                timeout=8,
             )
             if resp.status_code != 200:
-                return None
-            data = resp.json()
-            results = data.get("response", [])
-            if not results:
-                return None
-            pr_score = results[0].get("page_rank_decimal")
-            if pr_score is None:
-                return None
-
-            # Calibrated normalisation: sigmoid-like curve anchored at real examples
-            # PR=9 (google.com) → ~0.90, PR=7 (medium-sized news) → ~0.72,
-            # PR=5 (small news) → ~0.58, PR=2 → ~0.38
-            normalised = 0.20 + 0.70 * (1 - math.exp(-0.35 * float(pr_score)))
-            return round(normalised, 4)
-    except Exception:
-        return None
+                continue
+            results = orjson.loads(resp.content).get("response", [])
+        except Exception:
+            continue
+        for pos, item in enumerate(results):
+            if not isinstance(item, dict):
+                continue
+            domain = item.get("domain") or (chunk[pos] if pos < len(chunk) else None)
+            pr_score = item.get("page_rank_decimal")
+            if domain in chunk and pr_score is not None:
+                try:
+                    scores[domain] = _normalise_pagerank(pr_score)
+                except (TypeError, ValueError):
+                    continue
+    return scores
 
 
 # ── Tier-3: LLM inference (GPT-4o-mini) ──────────────────────────────────────
@@ -158,9 +202,8 @@ async def _tier3_llm(domain: str) -> float | None:
     if not settings.openai_api_key:
         return None
     try:
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        resp = await client.chat.completions.create(
+        from agents.llm_cache import cached_chat_completion
+        content = await cached_chat_completion(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": _LLM_SYSTEM},
@@ -170,7 +213,7 @@ async def _tier3_llm(domain: str) -> float | None:
             max_tokens=120,
             response_format={"type": "json_object"},
         )
-        data = json.loads(resp.choices[0].message.content)
+        data = orjson.loads(content)
         score = data.get("score")
         if isinstance(score, (int, float)) and 0 <= score <= 1:
             return round(float(score), 4)
@@ -192,24 +235,61 @@ async def _cache_get(domain: str) -> float | None:
 
 
 async def _cache_set(domain: str, score: float, method: str) -> None:
-    """Persist a score to MongoDB."""
+    """Persist a score to MongoDB (one upsert, no read-before-write)."""
     try:
         from db.models import DomainTrust
         from datetime import datetime, timezone
-        entry = await DomainTrust.find_one(DomainTrust.domain == domain)
-        if entry:
-            entry.score = score
-            entry.method = method
-            entry.updated_at = datetime.now(timezone.utc)
-            await entry.save()
-        else:
-            await DomainTrust(domain=domain, score=score, method=method).insert()
+        await DomainTrust.get_motor_collection().update_one(
+            {"domain": domain},
+            {"$set": {"score": score, "method": method, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+    except Exception:
+        pass
+
+
+async def _cache_get_many(domains: list[str]) -> dict[str, float]:
+    """Cached scores for many domains in one query."""
+    if not domains:
+        return {}
+    try:
+        from db.models import DomainTrust
+        entries = await DomainTrust.find({"domain": {"$in": domains}}).to_list()
+        return {e.domain: e.score for e in entries}
+    except Exception:
+        return {}
+
+
+async def _cache_set_many(scores: dict[str, tuple[float, str]]) -> None:
+    """Upsert many {domain: (score, method)} entries in one bulk write."""
+    if not scores:
+        return
+    try:
+        from db.models import DomainTrust
+        from datetime import datetime, timezone
+        from pymongo import UpdateOne
+        now = datetime.now(timezone.utc)
+        await DomainTrust.get_motor_collection().bulk_write([
+            UpdateOne(
+                {"domain": domain},
+                {"$set": {"score": score, "method": method, "updated_at": now}},
+                upsert=True,
+            )
+            for domain, (score, method) in scores.items()
+        ], ordered=False)
     except Exception:
         pass
 
 
 # ── Public API ────────────────────────────────────────────────────────────────
 
+# Per-domain scores below tier 1, kept in-process for an hour so repeat domains
+# within and across jobs skip the Mongo round-trip
+_domain_cache: TTLCache[str, float] = TTLCache(maxsize=10_000, ttl=3600)
+# Lookups already running, by domain
+_lookups: Coalescer[float] = Coalescer()
+
+
 async def get_source_authority(url: str | None) -> float:
     """
     Main entry point. Returns a 0-1 credibility score for the given URL.
@@ -225,6 +305,17 @@ async def get_source_authority(url: str | None) -> float:
 
     domain = _extract_domain(url)
 
+    # In-process cache, then share any lookup already running for this domain
+    cached = _domain_cache.get(domain)
+    if cached is not None:
+        return cached
+    score = await _lookups.run(domain, lambda: _lookup_domain(domain))
+    _domain_cache[domain] = score
+    return score
+
+
+async def _lookup_domain(domain: str) -> float:
+    """Tiers below tier 1 for one domain: MongoDB cache → OpenPageRank → LLM → default."""
     # MongoDB cache
     cached = await _cache_get(domain)
     if cached is not None:
@@ -245,3 +336,39 @@ async def get_source_authority(url: str | None) -> float:
     # Complete fallback
     await _cache_set(domain, 0.45, "default")
     return 0.45
+
+
+async def get_source_authorities(urls: list[str | None]) -> dict[str, float]:
+    """
+    `get_source_authority` for many URLs at once → {url: score}. Domains that
+    miss tier 1 share one cache query, one OpenPageRank request per 100
+    domains and one bulk cache write. Empty URLs are left out of the result.
+    """
+    out: dict[str, float] = {}
+    domain_urls: dict[str, list[str]] = {}
+    for url in dict.fromkeys(u for u in urls if u):
+        t1 = _tier1_lookup(url)
+        if t1 is not None:
+            out[url] = t1
+        else:
+            domain_urls.setdefault(_extract_domain(url), []).append(url)
+
+    scores = {d: _domain_cache[d] for d in domain_urls if d in _domain_cache}
+    scores.update(await _cache_get_many([d for d in domain_urls if d not in scores]))
+    fresh: dict[str, tuple[float, str]] = {}
+
+    missing = [d for d in domain_urls if d not in scores]
+    for domain, t2 in (await _tier2_openpagerank_many(missing)).items():
+        fresh[domain] = (t2, "openpagerank")
+
+    missing = [d for d in missing if d not in fresh]
+    for domain, t3 in zip(missing, await asyncio.gather(*(_tier3_llm(d) for d in missing))):
+        fresh[domain] = (t3, "llm") if t3 is not None else (0.45, "default")
+
+    await _cache_set_many(fresh)
+    scores.update({domain: score for domain, (score, _) in fresh.items()})
+    _domain_cache.update(scores)
+    for domain, domain_url_list in domain_urls.items():
+        for url in domain_url_list:
+            out[url] = scores[domain]
+    return out
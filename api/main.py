@@ -1,14 +1,21 @@
 from __future__ import annotations
 import asyncio
+import hashlib
+import os
+import threading
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, UploadFile, File
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from pydantic import TypeAdapter
+from config import settings
 from db.connection import init_db
-from db.models import DocumentRecord, SummaryJob, SummaryReport
+from db.models import DocumentRecord, DocumentRecordLite, SummaryJob, SummaryReport
 from api.schemas import (
     SummarizeRequest, JobResponse, JobStatusResponse,
     SummaryReportResponse, DocumentSummary, DocTypeInfo,
@@ -16,13 +23,33 @@ from api.schemas import (
 )
 from conflict.strategies import DEFAULT_STRATEGY_BY_TYPE
 from agents.orchestrator import Orchestrator
+from conflict.resolver import warm_up as warm_up_resolver
+from agents.http_client import close_http_client
+from agents.openai_client import close_client as close_openai_client
+from utils.cpu_pool import shutdown_cpu_pool
 from api import qa_router as _qa_module
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    # Load the claim-embedding model now rather than on the first /summarize
+    try:
+        await asyncio.to_thread(warm_up_resolver)
+    except Exception:
+        pass  # e.g. offline with no model cache; it loads lazily on first use
+    # Pooled client for /fetch-url, reused across requests
+    app.state.http_client = httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=15,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
     yield
+    await app.state.http_client.aclose()
+    await close_http_client()
+    await close_openai_client()
+    shutdown_cpu_pool()
 
 
 app = FastAPI(
@@ -47,15 +74,126 @@ app.include_router(_qa_module.router)
 
 # ─── Background task runner ───────────────────────────────────────────────────
 
+# Backpressure for bursts of submissions: each run holds models and LLM connections
+_JOB_SEM = asyncio.Semaphore(settings.max_concurrent_jobs)
+
+
 async def _run_job(job_id: str, doc_ids: list[str]):
-    job = await SummaryJob.find_one(SummaryJob.job_id == job_id)
-    docs = []
-    for did in doc_ids:
-        doc = await DocumentRecord.find_one(DocumentRecord.doc_id == did)
-        if doc:
-            docs.append(doc)
-    if job and docs:
-        await orchestrator.run(job, docs)
+    async with _JOB_SEM:
+        job = await SummaryJob.find_one(SummaryJob.job_id == job_id)
+        docs = await DocumentRecord.get_many(doc_ids)
+        if job and docs:
+            await orchestrator.run(job, docs)
+
+
+# ─── HTML extraction ──────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=32)
+def _html_parser(encoding: str) -> lxml.html.HTMLParser:
+    try:
+        return lxml.html.HTMLParser(encoding=encoding)
+    except LookupError:  # charset libxml2 doesn't know
+        return lxml.html.HTMLParser(encoding="utf-8")
+
+_BOILERPLATE_TAGS = ("script", "style", "nav", "footer", "header", "aside", "form", "noscript", "iframe")
+_TITLE_XPATH = etree.XPath('(//meta[@property="og:title"])[1]/@content')
+_BLOCKS_XPATH = etree.XPath(".//p | .//li")
+
+
+def _text_pieces(el) -> list[str]:
+    return [t.strip() for t in el.itertext() if t.strip()]
+
+
+def _extract_article(html: bytes, encoding: str = "utf-8") -> tuple[str, str]:
+    """(title, text) of a page: og:title → <title> → <h1>, then the 40+ char
+    <p>/<li> blocks of the first <article>, <main> or <body>, boilerplate removed.
+    `html` is the raw body, decoded by libxml2 as `encoding`."""
+    tree = lxml.html.document_fromstring(html, parser=_html_parser(encoding.lower()))
+
+    title = ""
+    og_title = _TITLE_XPATH(tree)
+    title_el = tree.find(".//title")
+    if og_title and og_title[0]:
+        title = og_title[0]
+    elif title_el is not None:
+        title = "".join(_text_pieces(title_el))
+    elif (h1 := tree.find(".//h1")) is not None:
+        title = "".join(_text_pieces(h1))
+
+    etree.strip_elements(tree, *_BOILERPLATE_TAGS, with_tail=False)
+
+    # Try article tag first, then main, then body
+    content_root = next(
+        (el for el in (tree.find(".//article"), tree.find(".//main"), tree.find(".//body")) if el is not None),
+        tree,
+    )
+    paragraphs = []
+    for block in _BLOCKS_XPATH(content_root):
+        pieces = _text_pieces(block)
+        if len("".join(pieces)) > 40:
+            paragraphs.append(" ".join(pieces))
+    return title, "\n\n".join(paragraphs)
+
+
+# ─── File parsing ─────────────────────────────────────────────────────────────
+
+# Caps concurrent uploads being parsed so large batches don't flood the
+# default thread pool. PDFium itself is not thread-safe, hence the lock.
+_PARSE_SEM = asyncio.Semaphore(os.cpu_count() or 1)
+_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _parse_pdf(contents: bytes) -> tuple[str, str]:
+    """(text, metadata title) of a PDF; blocking, run via asyncio.to_thread."""
+    import pypdfium2 as pdfium
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(contents)
+        try:
+            # One page (and its text page) open at a time
+            pages = []
+            for i in range(len(pdf)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                try:
+                    page_text = textpage.get_text_range().replace("\r\n", "\n")
+                finally:
+                    textpage.close()
+                    page.close()
+                if page_text.strip():
+                    pages.append(page_text)
+            title = (pdf.get_metadata_dict().get("Title") or "").strip()
+        finally:
+            pdf.close()
+    return "\n\n".join(pages), title
+
+
+def _parse_docx(contents: bytes) -> tuple[str, str]:
+    """(text, first paragraph) of a DOCX; blocking, run via asyncio.to_thread."""
+    import io
+    from docx import Document
+    doc = Document(io.BytesIO(contents))
+    paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
+    # First non-empty paragraph is often the title
+    title = paragraphs[0][:120] if paragraphs else ""
+    return "\n\n".join(paragraphs), title
+
+
+# ─── Conditional GET helpers ──────────────────────────────────────────────────
+
+def _make_etag(version: str) -> str:
+    """Strong ETag for a representation identified by `version`."""
+    return '"' + hashlib.sha1(version.encode("utf-8")).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists `etag` (or `*`)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
 
 
 # ─── Endpoints ────────────────────────────────────────────────────────────────
@@ -67,44 +205,20 @@ async def health():
 
 @app.get("/fetch-url")
 async def fetch_url(url: str = Query(..., description="URL to fetch article content from")):
-    """Fetch and extract article text from a URL using BeautifulSoup."""
+    """Fetch and extract article text from a URL using lxml."""
     try:
         headers = {"User-Agent": "Mozilla/5.0 (compatible; MultiDocSummarizer/1.0)"}
-        async with httpx.AsyncClient(follow_redirects=True, timeout=15) as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            html = resp.text
+        resp = await app.state.http_client.get(url, headers=headers)
+        resp.raise_for_status()
+        # Raw bytes straight to lxml; same charset httpx would decode .text with
+        html, encoding = resp.content, resp.encoding or "utf-8"
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=422, detail=f"URL returned HTTP {e.response.status_code}: {url}")
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Could not fetch URL: {e}")
 
     try:
-        soup = BeautifulSoup(html, "lxml")
-
-        # Extract title
-        title = ""
-        og_title = soup.find("meta", property="og:title")
-        if og_title and og_title.get("content"):
-            title = og_title["content"]
-        elif soup.find("title"):
-            title = soup.find("title").get_text(strip=True)
-        elif soup.find("h1"):
-            title = soup.find("h1").get_text(strip=True)
-
-        # Remove boilerplate tags
-        for tag in soup(["script", "style", "nav", "footer", "header",
-                        "aside", "form", "noscript", "iframe"]):
-            tag.decompose()
-
-        # Try article tag first, then main, then body
-        content_root = soup.find("article") or soup.find("main") or soup.find("body") or soup
-        paragraphs = [
-            p.get_text(" ", strip=True)
-            for p in content_root.find_all(["p", "li"])
-            if len(p.get_text(strip=True)) > 40
-        ]
-        text = "\n\n".join(paragraphs)
+        title, text = _extract_article(html, encoding)
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Failed to parse page content: {e}")
 
@@ -129,43 +243,27 @@ async def upload_file(file: UploadFile = File(...)):
             detail=f"Unsupported file type '.{ext}'. Please upload a PDF or DOCX file."
         )
 
-    contents = await file.read()
-    if len(contents) > 50 * 1024 * 1024:  # 50 MB cap
-        raise HTTPException(status_code=422, detail="File too large. Maximum size is 50 MB.")
+    # Read in chunks so an oversized upload fails as soon as it crosses the cap
+    chunks: list[bytes] = []
+    size = 0
+    while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > _MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=422, detail="File too large. Maximum size is 50 MB.")
+        chunks.append(chunk)
+    contents = b"".join(chunks)
 
     title = filename.rsplit(".", 1)[0].replace("_", " ").replace("-", " ").strip()
-    text = ""
 
+    parse = _parse_pdf if ext == "pdf" else _parse_docx
     try:
-        if ext == "pdf":
-            import io
-            from pypdf import PdfReader
-            reader = PdfReader(io.BytesIO(contents))
-            pages = []
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                if page_text.strip():
-                    pages.append(page_text)
-            text = "\n\n".join(pages)
-
-            # Try to get title from PDF metadata
-            meta = reader.metadata
-            if meta and meta.title:
-                title = meta.title.strip() or title
-
-        elif ext in ("docx", "doc"):
-            import io
-            from docx import Document
-            doc = Document(io.BytesIO(contents))
-            paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-            text = "\n\n".join(paragraphs)
-
-            # First non-empty paragraph is often the title
-            if paragraphs and not title:
-                title = paragraphs[0][:120]
-
+        # Parsing is CPU-bound: run it off the event loop, a bounded number at a time
+        async with _PARSE_SEM:
+            text, parsed_title = await asyncio.to_thread(parse, contents)
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Failed to parse file: {e}")
+    # PDF metadata title beats the filename; a DOCX's first paragraph only fills a blank one
+    title = (parsed_title or title) if ext == "pdf" else (title or parsed_title)
 
     text = text.strip()
     if len(text) < 50:
@@ -178,72 +276,85 @@ async def upload_file(file: UploadFile = File(...)):
 
 
 
+# Static: built (and validated) once at import
+_DOC_TYPES: list[DocTypeInfo] = [
+    DocTypeInfo(
+        doc_type="research_paper",
+        credibility_signals=[
+            {"signal": "Journal Impact Factor", "weight": "35%"},
+            {"signal": "Citation count (log-scaled)", "weight": "25%"},
+            {"signal": "Recency (5yr half-life)", "weight": "20%"},
+            {"signal": "Author h-index", "weight": "15%"},
+            {"signal": "Peer-review status", "weight": "5%"},
+        ],
+        default_strategy=DEFAULT_STRATEGY_BY_TYPE["research_paper"],
+    ),
+    DocTypeInfo(
+        doc_type="news_article",
+        credibility_signals=[
+            {"signal": "Source trust score (Media Bias DB)", "weight": "40%"},
+            {"signal": "Recency", "weight": "20%"},
+            {"signal": "Primary source citations", "weight": "15%"},
+            {"signal": "Cross-source corroboration", "weight": "15%"},
+            {"signal": "Author byline", "weight": "10%"},
+        ],
+        default_strategy=DEFAULT_STRATEGY_BY_TYPE["news_article"],
+    ),
+    DocTypeInfo(
+        doc_type="blog_post",
+        credibility_signals=[
+            {"signal": "Domain authority", "weight": "30%"},
+            {"signal": "Author credentials (LLM)", "weight": "25%"},
+            {"signal": "External references cited", "weight": "25%"},
+            {"signal": "Recency", "weight": "20%"},
+        ],
+        default_strategy=DEFAULT_STRATEGY_BY_TYPE["blog_post"],
+    ),
+    DocTypeInfo(
+        doc_type="legal_document",
+        credibility_signals=[
+            {"signal": "Official/gov source", "weight": "35%"},
+            {"signal": "Jurisdiction authority", "weight": "30%"},
+            {"signal": "Statute citations", "weight": "20%"},
+            {"signal": "Recency", "weight": "15%"},
+        ],
+        default_strategy=DEFAULT_STRATEGY_BY_TYPE["legal_document"],
+    ),
+]
+
+
+_DOC_TYPES_ETAG = _make_etag(TypeAdapter(list[DocTypeInfo]).dump_json(_DOC_TYPES).decode())
+
+
 @app.get("/doc-types", response_model=list[DocTypeInfo])
-async def get_doc_types():
-    return [
-        DocTypeInfo(
-            doc_type="research_paper",
-            credibility_signals=[
-                {"signal": "Journal Impact Factor", "weight": "35%"},
-                {"signal": "Citation count (log-scaled)", "weight": "25%"},
-                {"signal": "Recency (5yr half-life)", "weight": "20%"},
-                {"signal": "Author h-index", "weight": "15%"},
-                {"signal": "Peer-review status", "weight": "5%"},
-            ],
-            default_strategy=DEFAULT_STRATEGY_BY_TYPE["research_paper"],
-        ),
-        DocTypeInfo(
-            doc_type="news_article",
-            credibility_signals=[
-                {"signal": "Source trust score (Media Bias DB)", "weight": "40%"},
-                {"signal": "Recency", "weight": "20%"},
-                {"signal": "Primary source citations", "weight": "15%"},
-                {"signal": "Cross-source corroboration", "weight": "15%"},
-                {"signal": "Author byline", "weight": "10%"},
-            ],
-            default_strategy=DEFAULT_STRATEGY_BY_TYPE["news_article"],
-        ),
-        DocTypeInfo(
-            doc_type="blog_post",
-            credibility_signals=[
-                {"signal": "Domain authority", "weight": "30%"},
-                {"signal": "Author credentials (LLM)", "weight": "25%"},
-                {"signal": "External references cited", "weight": "25%"},
-                {"signal": "Recency", "weight": "20%"},
-            ],
-            default_strategy=DEFAULT_STRATEGY_BY_TYPE["blog_post"],
-        ),
-        DocTypeInfo(
-            doc_type="legal_document",
-            credibility_signals=[
-                {"signal": "Official/gov source", "weight": "35%"},
-                {"signal": "Jurisdiction authority", "weight": "30%"},
-                {"signal": "Statute citations", "weight": "20%"},
-                {"signal": "Recency", "weight": "15%"},
-            ],
-            default_strategy=DEFAULT_STRATEGY_BY_TYPE["legal_document"],
-        ),
-    ]
+async def get_doc_types(request: Request, response: Response):
+    headers = {"Cache-Control": "public, max-age=86400", "ETag": _DOC_TYPES_ETAG}
+    if _etag_matches(request, _DOC_TYPES_ETAG):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return _DOC_TYPES
+
+
+_TRUNCATED_MARKER = "\n\n[... truncated for storage ...]"
 
 
 @app.post("/summarize", response_model=JobResponse, status_code=202)
 async def submit_summarize(request: SummarizeRequest, background_tasks: BackgroundTasks):
     """Submit documents for summarization. Returns a job_id to poll status."""
-    # Persist raw documents
-    doc_records = []
+    # Persist raw documents (doc_ids are generated client-side, so one batch insert suffices)
     _MAX_RAW_CHARS = 400_000  # ~100k words, safely under MongoDB's 16 MB BSON limit
-    for inp in request.documents:
-        stored_text = inp.text if len(inp.text) <= _MAX_RAW_CHARS else inp.text[:_MAX_RAW_CHARS] + "\n\n[... truncated for storage ...]"
-        rec = DocumentRecord(
-            raw_text=stored_text,
+    doc_records = [
+        DocumentRecord(
+            # Oversized text: slice and marker built in one allocation
+            raw_text=inp.text if len(inp.text) <= _MAX_RAW_CHARS else f"{inp.text[:_MAX_RAW_CHARS]}{_TRUNCATED_MARKER}",
             title=inp.title,
             source_url=inp.source_url,
             doc_type=inp.doc_type or "unknown",
             metadata=inp.metadata,
         )
-        await rec.insert()
-        doc_records.append(rec)
-
+        for inp in request.documents
+    ]
+    await DocumentRecord.insert_many(doc_records)
 
     job = SummaryJob(
         doc_ids=[d.doc_id for d in doc_records],
@@ -277,6 +388,9 @@ async def get_job_status(job_id: str):
     )
 
 
+_REPORT_LIST_ADAPTER = TypeAdapter(list[SummaryReportResponse])
+
+
 @app.get("/reports", response_model=list[SummaryReportResponse])
 async def list_reports(
     skip: int = 0,
@@ -295,9 +409,10 @@ async def list_reports(
     if has_conflicts is not None:
         if has_conflicts:
             # Reports that have at least one conflict
-            query = query.find({"conflicts": {"$exists": True, "$not": {"$size": 0}}})
+            query = query.find({"conflicts.0": {"$exists": True}})
         else:
-            query = query.find({"$or": [{"conflicts": {"$size": 0}}, {"conflicts": {"$exists": False}}]})
+            # Empty or missing array; no $or, which a $text query can't be combined with
+            query = query.find({"conflicts.0": {"$exists": False}})
     if is_saved is not None:
         query = query.find(SummaryReport.is_saved == is_saved)
     if date_from:
@@ -313,27 +428,43 @@ async def list_reports(
         except ValueError:
             pass
     if search:
-        query = query.find({"full_summary": {"$regex": search, "$options": "i"}})
+        if len(search.strip()) >= 3:
+            query = query.find({"$text": {"$search": search}})
+        else:
+            # Too short to be a useful text-index term: substring match instead
+            query = query.find({"full_summary": {"$regex": search, "$options": "i"}})
+
+    reports = await query.sort(-SummaryReport.created_at).skip(skip).limit(limit).to_list()
+    # Already SummaryReportResponse models: dump straight to JSON bytes rather
+    # than letting FastAPI re-validate each page item against response_model
+    return Response(
+        _REPORT_LIST_ADAPTER.dump_json([_format_report(r, []) for r in reports]),
+        media_type="application/json",
+    )
+
 
-    reports = await query.skip(skip).limit(limit).to_list()
-    return [_format_report(r, []) for r in reports]
+def _report_etag(report: SummaryReport) -> str:
+    # A report only changes through PATCH (title / saved flag); its content and
+    # documents are fixed once the job finishes
+    return _make_etag(f"{report.report_id}:{report.created_at.isoformat()}:{report.report_title}:{report.is_saved}")
 
 
 @app.get("/reports/{report_id}", response_model=SummaryReportResponse)
-async def get_report(report_id: str):
+async def get_report(report_id: str, request: Request, response: Response):
     report = await SummaryReport.find_one(SummaryReport.report_id == report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-    docs = []
-    for did in report.doc_ids:
-        doc = await DocumentRecord.find_one(DocumentRecord.doc_id == did)
-        if doc:
-            docs.append(doc)
+    etag = _report_etag(report)
+    if _etag_matches(request, etag):
+        # Client copy is current: skip loading the documents and the payload
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    docs = await DocumentRecord.get_many(report.doc_ids, projection=DocumentRecordLite)
     return _format_report(report, docs)
 
 
 @app.patch("/reports/{report_id}", response_model=SummaryReportResponse)
-async def update_report(report_id: str, body: UpdateReportRequest):
+async def update_report(report_id: str, body: UpdateReportRequest, response: Response):
     """Update a report's title or saved status."""
     report = await SummaryReport.find_one(SummaryReport.report_id == report_id)
     if not report:
@@ -343,11 +474,8 @@ async def update_report(report_id: str, body: UpdateReportRequest):
     if body.is_saved is not None:
         report.is_saved = body.is_saved
     await report.save()
-    docs = []
-    for did in report.doc_ids:
-        doc = await DocumentRecord.find_one(DocumentRecord.doc_id == did)
-        if doc:
-            docs.append(doc)
+    response.headers["ETag"] = _report_etag(report)
+    docs = await DocumentRecord.get_many(report.doc_ids, projection=DocumentRecordLite)
     return _format_report(report, docs)
 
 
@@ -359,7 +487,7 @@ async def delete_report(report_id: str):
     await report.delete()
 
 
-def _format_report(report: SummaryReport, docs: list[DocumentRecord]) -> SummaryReportResponse:
+def _format_report(report: SummaryReport, docs: list[DocumentRecordLite]) -> SummaryReportResponse:
     return SummaryReportResponse(
         report_id=report.report_id,
         job_id=report.job_id,
@@ -3,13 +3,55 @@ Q&A Router — allows users to ask freeform questions about documents in a repor
 Uses the document text as context and OpenAI to generate grounded answers.
 """
 from __future__ import annotations
+import asyncio
+from collections import defaultdict
 from fastapi import APIRouter, HTTPException
 from db.models import SummaryReport, DocumentRecord
 from api.schemas import QARequest, QAResponse
+from agents import openai_client
 from config import settings
+from utils.passage_index import has_passage_index, top_passages
 
 router = APIRouter()
 
+_TOP_K_PASSAGES = 8
+
+
+def _doc_title(doc: DocumentRecord, i: int) -> str:
+    return doc.title or f"Document {i}"
+
+
+def _prefix_context(docs: list[DocumentRecord]) -> str:
+    """Fallback context: the opening of each document (prefer condensed text if available)."""
+    doc_contexts = []
+    for i, doc in enumerate(docs, 1):
+        text = doc.metadata.get("condensed_text") or doc.raw_text
+        # Truncate per doc to fit context window (first 6000 chars each)
+        doc_contexts.append(f"[Document {i}: {_doc_title(doc, i)}]\n{text[:6000]}")
+    return "\n\n---\n\n".join(doc_contexts)
+
+
+async def _build_context(question: str, docs: list[DocumentRecord]) -> str:
+    """
+    The passages most relevant to `question`, grouped under their document
+    headers. Falls back to document prefixes for reports summarized before
+    passage indexing, or if the embedding model is unavailable.
+    """
+    if not all(has_passage_index(doc) for doc in docs):
+        return _prefix_context(docs)
+    try:
+        hits = await asyncio.to_thread(top_passages, question, docs, _TOP_K_PASSAGES)
+    except Exception:
+        return _prefix_context(docs)
+
+    by_doc: dict[int, list[str]] = defaultdict(list)
+    for doc_index, passage in hits:
+        by_doc[doc_index].append(passage)
+    return "\n\n---\n\n".join(
+        f"[Document {i + 1}: {_doc_title(docs[i], i + 1)}]\n" + "\n…\n".join(passages)
+        for i, passages in by_doc.items()
+    )
+
 
 @router.post("/qa", response_model=QAResponse)
 async def ask_question(req: QARequest) -> QAResponse:
@@ -20,34 +62,18 @@ async def ask_question(req: QARequest) -> QAResponse:
         raise HTTPException(status_code=404, detail="Report not found")
 
     # Fetch associated documents
-    docs = []
-    for did in report.doc_ids:
-        doc = await DocumentRecord.find_one(DocumentRecord.doc_id == did)
-        if doc:
-            docs.append(doc)
+    docs = await DocumentRecord.get_many(report.doc_ids)
 
     if not docs:
         raise HTTPException(status_code=404, detail="No documents found for this report")
 
-    # Build context from document text (prefer condensed text if available)
-    doc_contexts = []
-    for i, doc in enumerate(docs, 1):
-        text = doc.metadata.get("condensed_text") or doc.raw_text
-        title = doc.title or f"Document {i}"
-        # Truncate per doc to fit context window (first 6000 chars each)
-        truncated = text[:6000]
-        doc_contexts.append(f"[Document {i}: {title}]\n{truncated}")
-
-    full_context = "\n\n---\n\n".join(doc_contexts)
-
     if not settings.openai_api_key:
         raise HTTPException(
             status_code=503,
             detail="Q&A requires an OpenAI API key. Please configure OPENAI_API_KEY."
         )
 
-    from openai import AsyncOpenAI
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
+    full_context = await _build_context(req.question, docs)
 
     system_prompt = (
         "You are a precise document analysis assistant. "
@@ -64,7 +90,8 @@ async def ask_question(req: QARequest) -> QAResponse:
     )
 
     try:
-        resp = await client.chat.completions.create(
+        # Shared pooled client (kept-alive TLS session, global concurrency cap)
+        resp = await openai_client.chat(
             model=settings.openai_model,
             messages=[
                 {"role": "system", "content": system_prompt},
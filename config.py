@@ -8,6 +8,12 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = ""
     openai_model: str = "gpt-4o-mini"
+    openai_max_concurrency: int = 16  # concurrent chat completions across all agents
+    # Client-side per-minute budget for chat completions (0 disables)
+    openai_rpm: int = 5000
+    openai_tpm: int = 2_000_000
+    # RAG summary user message is cut to this many tokens (16k context less the completion)
+    openai_prompt_token_budget: int = 14000
 
     # MongoDB
     mongodb_uri: str = "mongodb://localhost:27017/multidoc"
@@ -16,8 +22,31 @@ class Settings(BaseSettings):
     # Summarizer
     summarizer_backend: Literal["rag", "bart"] = "rag"
     bart_model: str = "facebook/bart-large-cnn"
+    # auto = first CUDA device (in fp16) when available, else CPU; cuda forces the GPU
+    bart_device: Literal["auto", "cpu", "cuda"] = "auto"
+    # torch = HF model as-is; ort = ONNX Runtime export (needs the `onnx` extra)
+    bart_runtime: Literal["torch", "ort"] = "torch"
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     rag_top_k: int = 5
+    # Storage of RAG chunk vectors in FAISS: none (float32) | fp16 | int8
+    embedding_quantization: Literal["none", "fp16", "int8"] = "int8"
+    # Built RAG indexes kept on disk, keyed by chunk content + embedding setup; "" disables
+    faiss_cache_dir: str = ".cache/faiss"
+    faiss_cache_ttl_seconds: int = 7 * 24 * 3600
+
+    # LLM response cache (MongoDB TTL for deterministic prompts)
+    llm_cache_ttl_seconds: int = 30 * 24 * 3600
+    # Semantic Scholar lookups, keyed by normalised title
+    paper_meta_cache_ttl_seconds: int = 30 * 24 * 3600
+
+    # OpenAI Batch API for bulk (non-interactive) jobs
+    openai_batch_mode: bool = False
+    openai_batch_min_docs: int = 20
+
+    # Orchestrator: docs classified / processed concurrently per job
+    orchestrator_max_concurrency: int = 16
+    # Summarization jobs run at once; later submissions wait as "pending"
+    max_concurrent_jobs: int = 4
 
     # External APIs (optional)
     newsapi_key: str = ""
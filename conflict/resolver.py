@@ -3,23 +3,35 @@ Conflict Resolver: groups semantically similar claims, applies strategy,
 and returns a list of resolved claims + unresolved conflicts.
 """
 from __future__ import annotations
+from collections import Counter
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from db.models import DocumentRecord, Claim, Conflict, CredibilityScore
+from db.models import DocumentRecord, Claim, Conflict
 from conflict.strategies import STRATEGIES, DEFAULT_STRATEGY_BY_TYPE
 
 _model: SentenceTransformer | None = None
+_ENCODE_BATCH_SIZE = 128
 
 
 def _get_model() -> SentenceTransformer:
     global _model
     if _model is None:
-        _model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        import torch
+        if torch.cuda.is_available():
+            # Half precision halves memory traffic on GPU; CPU stays FP32
+            _model = SentenceTransformer(
+                "sentence-transformers/all-MiniLM-L6-v2",
+                device="cuda",
+                model_kwargs={"torch_dtype": torch.float16},
+            )
+        else:
+            _model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
     return _model
 
 
-def _cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-9))
+def warm_up() -> None:
+    """Load the embedding model ahead of the first job (blocking)."""
+    _get_model()
 
 
 def _cluster_claims(claims: list[Claim], threshold: float = 0.82) -> list[list[Claim]]:
@@ -28,23 +40,27 @@ def _cluster_claims(claims: list[Claim], threshold: float = 0.82) -> list[list[C
         return []
     model = _get_model()
     texts = [c.text for c in claims]
-    embeddings = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    embeddings = model.encode(
+        texts,
+        batch_size=_ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    # Unit vectors: one matmul gives every pairwise cosine similarity
+    sim = embeddings @ embeddings.T
 
     clusters: list[list[int]] = []
-    assigned = [False] * len(claims)
+    assigned = np.zeros(len(claims), dtype=bool)
 
     for i in range(len(claims)):
         if assigned[i]:
             continue
-        cluster = [i]
-        assigned[i] = True
-        for j in range(i + 1, len(claims)):
-            if not assigned[j]:
-                sim = _cosine_sim(embeddings[i], embeddings[j])
-                if sim >= threshold:
-                    cluster.append(j)
-                    assigned[j] = True
-        clusters.append(cluster)
+        mask = (sim[i] >= threshold) & ~assigned
+        mask[i] = True
+        cluster = np.flatnonzero(mask)
+        assigned[cluster] = True
+        clusters.append(cluster.tolist())
 
     return [[claims[i] for i in cluster] for cluster in clusters]
 
@@ -61,16 +77,13 @@ def resolve_conflicts(
         conflicts: list of Conflict objects (both resolved and unresolved)
     """
     # Build credibility map
-    cred_map: dict[str, CredibilityScore] = {
-        doc.doc_id: doc.credibility_score or CredibilityScore(overall=0.5)
+    cred_map: dict[str, float] = {
+        doc.doc_id: doc.credibility_score.overall if doc.credibility_score else 0.5
         for doc in docs
     }
 
     # Determine dominant doc type to select default strategy
-    type_counts: dict[str, int] = {}
-    for doc in docs:
-        type_counts[doc.doc_type] = type_counts.get(doc.doc_type, 0) + 1
-    dominant_type = max(type_counts, key=type_counts.get) if type_counts else "unknown"
+    dominant_type = (Counter(doc.doc_type for doc in docs).most_common(1) or [("unknown", 0)])[0][0]
 
     strategy_name = strategy_override or DEFAULT_STRATEGY_BY_TYPE.get(dominant_type, "weighted_vote")
     strategy_fn = STRATEGIES.get(strategy_name, STRATEGIES["weighted_vote"])
@@ -105,11 +118,11 @@ def resolve_conflicts(
         conflicts.append(conflict)
         if conflict.status == "resolved" and conflict.resolution:
             resolved_claims.append(
-                Claim(text=conflict.resolution, source_doc_id=cluster[0].source_doc_id, confidence=conflict.confidence)
+                Claim.from_trusted(text=conflict.resolution, source_doc_id=cluster[0].source_doc_id, confidence=conflict.confidence)
             )
         else:
             # Unresolved: include top-credibility claim but flag it
-            best = max(cluster, key=lambda c: cred_map.get(c.source_doc_id, CredibilityScore(overall=0)).overall)
-            resolved_claims.append(Claim(text=best.text, source_doc_id=best.source_doc_id, confidence=0.4))
+            best = max(cluster, key=lambda c: cred_map.get(c.source_doc_id, 0.0))
+            resolved_claims.append(Claim.from_trusted(text=best.text, source_doc_id=best.source_doc_id, confidence=0.4))
 
     return resolved_claims, conflicts
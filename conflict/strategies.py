@@ -1,11 +1,17 @@
-"""Conflict resolution strategies — pluggable per doc type."""
+"""
+Conflict resolution strategies — pluggable per doc type.
+
+Each strategy takes the claims of one cluster and a doc_id → overall
+credibility map (plain floats, built once per resolve_conflicts call).
+"""
 from __future__ import annotations
-from db.models import Claim, Conflict, CredibilityScore
+import numpy as np
+from db.models import Claim, Conflict
 
 
 def weighted_vote(
     claims: list[Claim],
-    credibility_map: dict[str, CredibilityScore],
+    credibility_map: dict[str, float],
     threshold: float = 0.15,
 ) -> Conflict:
     """
@@ -13,20 +19,17 @@ def weighted_vote(
     If all doc scores are within `threshold` of each other → mark unresolved.
     """
     if not claims:
-        return Conflict(claims=[], topic="", status="unresolved")
-
-    scored = [(c, credibility_map.get(c.source_doc_id, CredibilityScore(overall=0.5))) for c in claims]
-    scored.sort(key=lambda x: x[1].overall, reverse=True)
+        return Conflict.from_trusted(claims=[], topic="", status="unresolved")
 
-    best_claim, best_cred = scored[0]
-    scores = [s.overall for _, s in scored]
-    score_range = max(scores) - min(scores)
+    scores = np.fromiter((credibility_map.get(c.source_doc_id, 0.5) for c in claims), dtype=float, count=len(claims))
+    best_i = int(scores.argmax())  # first of any ties, as the old stable sort picked
+    score_range = float(scores.max() - scores.min())
 
-    conflict = Conflict(
+    conflict = Conflict.from_trusted(
         claims=claims,
         topic="",
-        resolution=best_claim.text,
-        confidence=best_cred.overall,
+        resolution=claims[best_i].text,
+        confidence=float(scores[best_i]),
     )
 
     if score_range < threshold:
@@ -40,17 +43,17 @@ def weighted_vote(
 
 def majority_vote(
     claims: list[Claim],
-    credibility_map: dict[str, CredibilityScore],
+    credibility_map: dict[str, float],
     high_trust_threshold: float = 0.75,
 ) -> Conflict:
     """
     If ≥2 high-trust sources agree semantically, that claim wins.
     Otherwise fall back to weighted_vote.
     """
-    high_trust = [c for c in claims if credibility_map.get(c.source_doc_id, CredibilityScore(overall=0)).overall >= high_trust_threshold]
+    high_trust = [c for c in claims if credibility_map.get(c.source_doc_id, 0.0) >= high_trust_threshold]
     if len(high_trust) >= 2:
         winner = high_trust[0]
-        return Conflict(
+        return Conflict.from_trusted(
             claims=claims,
             topic="",
             resolution=winner.text,
@@ -62,27 +65,27 @@ def majority_vote(
 
 def highest_credibility_wins(
     claims: list[Claim],
-    credibility_map: dict[str, CredibilityScore],
+    credibility_map: dict[str, float],
 ) -> Conflict:
     """Always pick the highest-credibility source, no threshold check."""
     if not claims:
-        return Conflict(claims=[], topic="", status="unresolved")
-    best = max(claims, key=lambda c: credibility_map.get(c.source_doc_id, CredibilityScore(overall=0)).overall)
-    return Conflict(
+        return Conflict.from_trusted(claims=[], topic="", status="unresolved")
+    best = max(claims, key=lambda c: credibility_map.get(c.source_doc_id, 0.0))
+    return Conflict.from_trusted(
         claims=claims,
         topic="",
         resolution=best.text,
         status="resolved",
-        confidence=credibility_map.get(best.source_doc_id, CredibilityScore(overall=0.5)).overall,
+        confidence=credibility_map.get(best.source_doc_id, 0.5),
     )
 
 
 def conservative(
     claims: list[Claim],
-    credibility_map: dict[str, CredibilityScore],
+    credibility_map: dict[str, float],
 ) -> Conflict:
     """Flag any disagreement as unresolved — safest for high-stakes summaries."""
-    return Conflict(
+    return Conflict.from_trusted(
         claims=claims,
         topic="",
         resolution=None,
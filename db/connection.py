@@ -1,7 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from config import settings
-from db.models import DocumentRecord, SummaryJob, SummaryReport, DomainTrust
+from db.models import DocumentRecord, SummaryJob, SummaryReport, DomainTrust, LLMCacheEntry, PaperMetaCache
 
 
 async def init_db() -> None:
@@ -10,5 +10,5 @@ async def init_db() -> None:
     database = client[settings.mongodb_db_name]
     await init_beanie(
         database=database,
-        document_models=[DocumentRecord, SummaryJob, SummaryReport, DomainTrust],
+        document_models=[DocumentRecord, SummaryJob, SummaryReport, DomainTrust, LLMCacheEntry, PaperMetaCache],
     )
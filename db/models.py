@@ -1,8 +1,10 @@
 from beanie import Document, Indexed
 from pydantic import BaseModel, Field
+from pymongo import IndexModel, TEXT
 from typing import Optional, Literal, Any
 from datetime import datetime, timezone
 import uuid
+from config import settings
 
 
 # ─── Sub-models ────────────────────────────────────────────────────────────────
@@ -14,14 +16,23 @@ class CredibilityScore(BaseModel):
     signals: dict[str, Any] = Field(default_factory=dict, description="Raw signal values")
 
 
-class Claim(BaseModel):
+class _TrustedModel(BaseModel):
+    @classmethod
+    def from_trusted(cls, **data):
+        """Build without validation, for values the pipeline itself produced
+        (already-typed strings/floats, validated sub-models). API input should
+        keep going through normal validation."""
+        return cls.model_construct(**data)
+
+
+class Claim(_TrustedModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     text: str
     source_doc_id: str
     confidence: float = 1.0
 
 
-class Conflict(BaseModel):
+class Conflict(_TrustedModel):
     claims: list[Claim]
     topic: str
     resolution: Optional[str] = None          # winning claim text
@@ -29,7 +40,7 @@ class Conflict(BaseModel):
     confidence: float = 0.0
 
 
-class SummarySection(BaseModel):
+class SummarySection(_TrustedModel):
     title: str
     content: str
 
@@ -43,7 +54,7 @@ JobStatus = Literal["pending", "running", "done", "failed"]
 class DocumentRecord(Document):
     """Stores a single uploaded/submitted document."""
 
-    doc_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    doc_id: Indexed(str, unique=True) = Field(default_factory=lambda: str(uuid.uuid4()))  # type: ignore[valid-type]
     doc_type: DocType = "unknown"
     title: Optional[str] = None
     source_url: Optional[str] = None
@@ -52,16 +63,43 @@ class DocumentRecord(Document):
     claims: list[Claim] = Field(default_factory=list)
     # Type-specific metadata stored flexibly (journal, publisher, author, etc.)
     metadata: dict[str, Any] = Field(default_factory=dict)
+    # /qa retrieval index (see utils/passage_index.py): word-window passages of
+    # the stored text and their MiniLM embeddings as packed float16 rows
+    passages: list[str] = Field(default_factory=list)
+    passage_embeddings: Optional[bytes] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     class Settings:
         name = "documents"
 
+    @classmethod
+    async def get_many(cls, doc_ids: list[str], projection: type[BaseModel] | None = None) -> list[Any]:
+        """
+        Fetch `doc_ids` in one `$in` query, returned in `doc_ids` order (missing
+        ids skipped). With `projection`, only that model's fields are loaded.
+        """
+        query = cls.find({"doc_id": {"$in": doc_ids}})
+        if projection is not None:
+            query = query.project(projection)
+        rows = await query.to_list()
+        by_id = {d.doc_id: d for d in rows}
+        return [by_id[did] for did in doc_ids if did in by_id]
+
+
+class DocumentRecordLite(BaseModel):
+    """Projection of DocumentRecord for report views — everything but the text, claims and indexes."""
+
+    doc_id: str
+    doc_type: DocType = "unknown"
+    title: Optional[str] = None
+    source_url: Optional[str] = None
+    credibility_score: Optional[CredibilityScore] = None
+
 
 class SummaryJob(Document):
     """Tracks an async summarization job."""
 
-    job_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    job_id: Indexed(str, unique=True) = Field(default_factory=lambda: str(uuid.uuid4()))  # type: ignore[valid-type]
     status: JobStatus = "pending"
     doc_ids: list[str] = Field(default_factory=list)
     summarizer_backend: str = "rag"
@@ -79,8 +117,8 @@ class SummaryJob(Document):
 class SummaryReport(Document):
     """Final output: resolved claims, conflict report, and summary."""
 
-    report_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    job_id: str
+    report_id: Indexed(str, unique=True) = Field(default_factory=lambda: str(uuid.uuid4()))  # type: ignore[valid-type]
+    job_id: Indexed(str)  # type: ignore[valid-type]
     doc_ids: list[str]
     resolved_claims: list[Claim] = Field(default_factory=list)
     conflicts: list[Conflict] = Field(default_factory=list)
@@ -94,6 +132,13 @@ class SummaryReport(Document):
 
     class Settings:
         name = "reports"
+        indexes = [
+            # Back the filters + newest-first paging of GET /reports
+            IndexModel([("created_at", -1)]),
+            IndexModel([("is_saved", 1), ("created_at", -1)]),
+            IndexModel([("doc_types_present", 1), ("created_at", -1)]),
+            IndexModel([("full_summary", TEXT)]),
+        ]
 
 
 class DomainTrust(Document):
@@ -107,3 +152,30 @@ class DomainTrust(Document):
     class Settings:
         name = "domain_trust"
 
+
+class LLMCacheEntry(Document):
+    """Cached LLM response text, keyed by a hash of the request (see agents/llm_cache.py)."""
+
+    key: Indexed(str, unique=True)  # type: ignore[valid-type]
+    value: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "llm_cache"
+        indexes = [
+            IndexModel([("created_at", 1)], expireAfterSeconds=settings.llm_cache_ttl_seconds),
+        ]
+
+
+class PaperMetaCache(Document):
+    """Cached Semantic Scholar search result, keyed by a hash of the normalised title."""
+
+    key: Indexed(str, unique=True)  # type: ignore[valid-type]
+    meta: dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "paper_meta_cache"
+        indexes = [
+            IndexModel([("created_at", 1)], expireAfterSeconds=settings.paper_meta_cache_ttl_seconds),
+        ]
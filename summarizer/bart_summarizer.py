@@ -1,5 +1,6 @@
 """BART-based offline summarizer using facebook/bart-large-cnn."""
 from __future__ import annotations
+import re
 from transformers import pipeline, Pipeline
 from db.models import Claim, Conflict, SummarySection
 from summarizer.base import BaseSummarizer
@@ -9,12 +10,85 @@ _pipe: Pipeline | None = None
 
 
 def _get_pipe() -> Pipeline:
+    """The process-wide pipeline, loaded on first use: GPU + bf16 (fp16 on GPUs
+    without bf16) when allowed by `settings.bart_device` and available, CPU
+    fp32 otherwise. With
+    `settings.bart_runtime == "ort"` the model runs on ONNX Runtime instead."""
     global _pipe
     if _pipe is None:
-        _pipe = pipeline(model=settings.bart_model, device=-1)
+        import torch
+        use_gpu = settings.bart_device == "cuda" or (settings.bart_device == "auto" and torch.cuda.is_available())
+        if settings.bart_runtime == "ort":
+            _pipe = _ort_pipe(use_gpu)
+        if _pipe is None:
+            if not use_gpu:
+                dtype = torch.float32
+            else:
+                # bf16 keeps fp32's exponent range: no overflow in long generations
+                dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            _pipe = pipeline(
+                "summarization",
+                model=settings.bart_model,
+                device=0 if use_gpu else -1,
+                torch_dtype=dtype,
+            )
+            _pipe.model.eval()
+            _pipe.model.config.use_cache = True
     return _pipe
 
 
+def _ort_pipe(use_gpu: bool) -> Pipeline | None:
+    """
+    Summarization pipeline over an ONNX Runtime export of `settings.bart_model`
+    (exported on first load). None when optimum / onnxruntime aren't installed
+    or the export fails, so the caller falls back to torch.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        from transformers import AutoTokenizer
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            settings.bart_model,
+            export=True,
+            provider="CUDAExecutionProvider" if use_gpu else "CPUExecutionProvider",
+        )
+        tokenizer = AutoTokenizer.from_pretrained(settings.bart_model)
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+    except Exception:
+        return None
+
+
+# Claims that describe how a study was done, for the Methodology section
+_METHOD_RE = re.compile(r"method|approach|experiment|study|analysis", re.IGNORECASE)
+
+_MAX_INPUT_TOKENS = 1024
+_CHUNK_STRIDE_TOKENS = 64
+
+
+def _token_chunks(tokenizer, text: str) -> list[str]:
+    """
+    `text` split into windows that fill the model's input (less the two special
+    tokens), overlapping by `_CHUNK_STRIDE_TOKENS`, cut on token boundaries.
+    """
+    max_tokens = min(tokenizer.model_max_length, _MAX_INPUT_TOKENS) - 2
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    step = max_tokens - _CHUNK_STRIDE_TOKENS
+    windows = [ids[i: i + max_tokens] for i in range(0, len(ids), step)]
+    # Drop a trailing window that is entirely overlap with the previous one
+    if len(windows) > 1 and len(ids) - (len(windows) - 1) * step <= _CHUNK_STRIDE_TOKENS:
+        windows.pop()
+    return tokenizer.batch_decode(windows, skip_special_tokens=True)
+
+
+def _last_sentence(text: str) -> str:
+    """The text between the last two periods (the final sentence when `text`
+    ends with one), or all of `text` if it has none."""
+    end = text.rfind(".")
+    if end == -1:
+        return text.strip()
+    start = text.rfind(".", 0, end)  # -1 → from the beginning
+    return text[start + 1: end].strip() + "."
+
+
 class BartSummarizer(BaseSummarizer):
 
     def _build_input_text(self, resolved_claims: list[Claim], conflicts: list[Conflict]) -> str:
@@ -36,22 +110,24 @@ class BartSummarizer(BaseSummarizer):
         conflicts: list[Conflict],
         doc_types: list[str],
     ) -> tuple[str, list[SummarySection]]:
+        import torch
         input_text = self._build_input_text(resolved_claims, conflicts)
         pipe = _get_pipe()
 
-        # Chunk if too long
-        max_input = 1024
-        chunks = [input_text[i: i + max_input] for i in range(0, len(input_text), max_input)]
-        summaries = []
-        for chunk in chunks[:3]:
-            result = pipe(
-                chunk,
+        chunks = _token_chunks(pipe.tokenizer, input_text) or [input_text]
+        # One padded batch through the model rather than a call per chunk;
+        # inference mode skips autograd bookkeeping for the whole generate
+        batch = chunks[:3]
+        with torch.inference_mode():
+            results = pipe(
+                batch,
                 max_length=200,
                 min_length=60,
                 do_sample=False,
                 truncation=True,
+                batch_size=len(batch),
             )
-            summaries.append(result[0]["summary_text"])
+        summaries = [r["summary_text"] for r in results]
 
         full_summary = " ".join(summaries)
 
@@ -66,21 +142,17 @@ class BartSummarizer(BaseSummarizer):
             conflict_text = "\n".join(lines)
 
         sections = [
-            SummarySection(title="Key Findings", content=full_summary),
-            SummarySection(
+            SummarySection.from_trusted(title="Key Findings", content=full_summary),
+            SummarySection.from_trusted(
                 title="Conflicts Detected",
                 content=conflict_text if conflict_text else "No significant conflicts found.",
             ),
         ]
 
         if "research_paper" in doc_types:
-            method_text = " ".join(
-                c.text for c in resolved_claims if any(
-                    w in c.text.lower() for w in ["method", "approach", "experiment", "study", "analysis"]
-                )
-            )[:1000]
-            sections.append(SummarySection(title="Methodology", content=method_text or "See original papers for methodology."))
-
-        sections.append(SummarySection(title="Conclusion", content=full_summary.split(".")[-2].strip() + "."))
+            method_text = " ".join(c.text for c in resolved_claims if _METHOD_RE.search(c.text))[:1000]
+            sections.append(SummarySection.from_trusted(title="Methodology", content=method_text or "See original papers for methodology."))
+
+        sections.append(SummarySection.from_trusted(title="Conclusion", content=_last_sentence(full_summary)))
 
         return full_summary, sections
@@ -0,0 +1,133 @@
+"""
+Batched, cached OpenAI embeddings for the RAG summarizer.
+
+`BatchedEmbedder.embed` queues single texts (retrieval queries) and flushes
+them as one `embeddings.create(input=[...])` request once `max_batch` texts are
+waiting or `max_wait_ms` has passed, so concurrent retrievals share a round
+trip. `embed_batch` embeds an already-batched list (index chunks) directly.
+
+Both go through a process-wide LRU keyed by a 16-byte blake2b digest of
+(model, text): re-summarizing the same documents or re-asking the same query
+skips the network. Vectors are returned raw (unnormalised) and read-only.
+
+An embedder's queue belongs to the event loop it is first awaited on.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from openai import AsyncOpenAI
+
+EMBED_MODEL = "text-embedding-3-small"
+
+_CACHE_MAX_ENTRIES = 1024
+_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+
+
+def _cache_key(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+def _cache_get(key: bytes) -> np.ndarray | None:
+    vec = _cache.get(key)
+    if vec is not None:
+        _cache.move_to_end(key)
+    return vec
+
+
+def _cache_set(key: bytes, vec: np.ndarray) -> None:
+    _cache[key] = vec
+    _cache.move_to_end(key)
+    while len(_cache) > _CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def _as_vector(embedding: list[float]) -> np.ndarray:
+    vec = np.asarray(embedding, dtype=np.float32)
+    vec.setflags(write=False)  # shared through the cache
+    return vec
+
+
+class BatchedEmbedder:
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model: str = EMBED_MODEL,
+        max_batch: int = 64,
+        max_wait_ms: float = 10,
+    ):
+        self._client = client
+        self._model = model
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000
+        # key → (text, future) for texts waiting on the next flush
+        self._pending: dict[bytes, tuple[str, asyncio.Future]] = {}
+        self._timer: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embedding of `text`, batched with other texts queued in the same window."""
+        key = _cache_key(self._model, text)
+        cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        queued = self._pending.get(key)
+        if queued is not None:
+            return await asyncio.shield(queued[1])
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending[key] = (text, fut)
+        if len(self._pending) >= self._max_batch:
+            self._spawn(self._flush(self._take()))
+        elif self._timer is None:
+            self._timer = loop.create_task(self._flush_after_wait())
+        return await asyncio.shield(fut)
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        """(len(texts), dim) embeddings; cache misses go out as a single request."""
+        keys = [_cache_key(self._model, t) for t in texts]
+        vectors = [_cache_get(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            resp = await self._client.embeddings.create(
+                model=self._model,
+                input=[texts[i] for i in missing],
+            )
+            for i, item in zip(missing, resp.data):
+                vectors[i] = _as_vector(item.embedding)
+                _cache_set(keys[i], vectors[i])
+        return np.vstack(vectors)
+
+    def _take(self) -> dict[bytes, tuple[str, asyncio.Future]]:
+        batch, self._pending = self._pending, {}
+        return batch
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush_after_wait(self) -> None:
+        await asyncio.sleep(self._max_wait)
+        self._timer = None
+        if self._pending:
+            await self._flush(self._take())
+
+    async def _flush(self, batch: dict[bytes, tuple[str, asyncio.Future]]) -> None:
+        try:
+            resp = await self._client.embeddings.create(
+                model=self._model,
+                input=[text for text, _ in batch.values()],
+            )
+        except Exception as exc:
+            for _, fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (key, (_, fut)), item in zip(batch.items(), resp.data):
+            vec = _as_vector(item.embedding)
+            _cache_set(key, vec)
+            if not fut.done():
+                fut.set_result(vec)
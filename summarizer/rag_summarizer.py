@@ -5,41 +5,177 @@ Falls back to simple keyword retrieval if no API key.
 Supports summary depth levels: brief | standard | detailed | deep_research.
 """
 from __future__ import annotations
+import asyncio
+import hashlib
+import heapq
+import os
 import re
+import time
+import uuid
+from array import array
+from collections import Counter
+from collections.abc import Callable
+from functools import cache, lru_cache
+from itertools import islice
+from pathlib import Path
 import numpy as np
 import faiss
-from openai import AsyncOpenAI
 from db.models import Claim, Conflict, SummarySection, DocumentRecord
 from summarizer.base import BaseSummarizer
+from summarizer.embedder import BatchedEmbedder, EMBED_MODEL
 from config import settings
 
+_WORD_RE = re.compile(r"\w+")
+_SECTION_RE = re.compile(r"^##\s*", re.MULTILINE)
+
+# Embedding requests in flight at once while building the FAISS index
+_INDEX_EMBED_CONCURRENCY = 8
+
+# Below this many chunks an exact flat scan is as fast as HNSW and needs no graph
+_HNSW_MIN_VECTORS = 512
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_EF_SEARCH = 64
+
+
+_SQ_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def _make_index(arr: np.ndarray) -> faiss.Index:
+    """
+    Inner-product index over the unit vectors `arr`: exact float32 for small
+    corpora, HNSW above. HNSW indexes store vectors as fp16 / int8 codes per
+    `settings.embedding_quantization` (queries stay float32). Small corpora are
+    a few MB at most and too few vectors to train int8 ranges on, so they
+    aren't quantized.
+    """
+    dim = arr.shape[1]
+    if len(arr) < _HNSW_MIN_VECTORS:
+        index = faiss.IndexFlatIP(dim)
+    else:
+        qtype = _SQ_TYPES.get(settings.embedding_quantization)
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(dim, _HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWSQ(dim, qtype, _HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.train(arr)  # int8 learns per-dimension ranges; no-op for fp16
+        index.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+    index.add(arr)
+    return index
+
+
+# Used when the model's tokenizer can't be loaded
+_PROMPT_CHAR_BUDGET = 14000
+
+
+@cache
+def _prompt_encoding(model: str):
+    """tiktoken encoding for `model`; None if unknown or its BPE file can't be fetched."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+
+def _truncate_prompt(text: str) -> str:
+    """`text` cut to `settings.openai_prompt_token_budget` tokens, on a token boundary."""
+    enc = _prompt_encoding(settings.openai_model)
+    if enc is None:
+        return text[:_PROMPT_CHAR_BUDGET]
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= settings.openai_prompt_token_budget:
+        return text
+    return enc.decode(tokens[:settings.openai_prompt_token_budget])
+
 
 def _chunk_text(text: str, chunk_size: int = 300, overlap: int = 50) -> list[str]:
     words = text.split()
-    chunks = []
-    i = 0
-    while i < len(words):
-        chunk = " ".join(words[i: i + chunk_size])
-        chunks.append(chunk)
-        i += chunk_size - overlap
-    return chunks
-
-
-def _keyword_retrieve(chunks: list[str], query: str, top_k: int = 5) -> list[str]:
-    """Simple keyword-overlap retrieval when no embeddings available."""
-    query_words = set(re.findall(r"\w+", query.lower()))
-    scored = []
+    # str.join over a list slice runs in C; slicing a pre-joined string by
+    # word offsets measured slower, since the offsets are built in Python
+    return [" ".join(words[i: i + chunk_size]) for i in range(0, len(words), chunk_size - overlap)]
+
+
+class _KeywordIndex:
+    """
+    Inverted index (token → ids of chunks containing it) for keyword-overlap
+    retrieval when no embeddings are available. Chunks are tokenized once;
+    a query only touches the posting lists of its own tokens.
+    """
+
+    def __init__(self, chunks: list[str]):
+        self._size = len(chunks)
+        self._postings: dict[str, array] = {}
+        for idx, chunk in enumerate(chunks):
+            for tok in set(_WORD_RE.findall(chunk.lower())):
+                self._postings.setdefault(tok, array("i")).append(idx)
+
+    def search(self, query: str, top_k: int = 5) -> list[int]:
+        """
+        Ids of the `top_k` chunks sharing the most distinct tokens with `query`,
+        ties in chunk order; padded with non-matching chunks up to `top_k`.
+        """
+        overlap: Counter[int] = Counter()
+        for tok in set(_WORD_RE.findall(query.lower())):
+            overlap.update(self._postings.get(tok, ()))
+        best = heapq.nsmallest(top_k, overlap, key=lambda idx: (-overlap[idx], idx))
+        if len(best) < top_k:
+            picked = set(best)
+            best.extend(islice((i for i in range(self._size) if i not in picked), top_k - len(best)))
+        return best
+
+
+# ── On-disk index cache ───────────────────────────────────────────────────────
+
+def _index_cache_path(chunks: list[str]) -> Path | None:
+    """
+    Where the index for `chunks` is cached: keyed on the chunk texts (not doc
+    ids, so a re-condensed document misses) plus everything that shapes the
+    index. None when caching is disabled.
+    """
+    if not settings.faiss_cache_dir:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{EMBED_MODEL}\0{settings.embedding_quantization}\0{_HNSW_MIN_VECTORS}\0{_HNSW_M}".encode())
     for chunk in chunks:
-        chunk_words = set(re.findall(r"\w+", chunk.lower()))
-        overlap = len(query_words & chunk_words)
-        scored.append((overlap, chunk))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [c for _, c in scored[:top_k]]
+        h.update(b"\0")
+        h.update(chunk.encode("utf-8"))
+    return Path(settings.faiss_cache_dir) / f"{h.hexdigest()}.faiss"
+
+
+def _load_cached_index(path: Path, ntotal: int) -> faiss.Index | None:
+    """The index at `path` if it is fresh and holds `ntotal` vectors. Blocking."""
+    try:
+        if time.time() - path.stat().st_mtime > settings.faiss_cache_ttl_seconds:
+            return None
+        index = faiss.read_index(str(path))
+    except Exception:
+        return None
+    return index if index.ntotal == ntotal else None
+
+
+def _store_index(path: Path, index: faiss.Index) -> None:
+    """Write `index` to `path` atomically (temp file + rename). Blocking."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        faiss.write_index(index, str(tmp))
+        os.replace(tmp, path)
+    except Exception:
+        pass
 
 
 # ── Depth-specific prompt builders ────────────────────────────────────────────
 
 def _build_system_prompt(doc_types: list[str], depth: str, single_doc: bool) -> str:
+    return _build_system_prompt_cached(tuple(sorted(set(doc_types))), depth, single_doc)
+
+
+@lru_cache(maxsize=64)
+def _build_system_prompt_cached(doc_types: tuple[str, ...], depth: str, single_doc: bool) -> str:
     has_research = "research_paper" in doc_types
     has_legal = "legal_document" in doc_types
 
@@ -118,81 +254,135 @@ def _build_system_prompt(doc_types: list[str], depth: str, single_doc: bool) ->
         )
 
     # Fallback to standard
-    return _build_system_prompt(doc_types, "standard", single_doc)
+    return _build_system_prompt_cached(doc_types, "standard", single_doc)
+
+
+# ── Shared OpenAI access ──────────────────────────────────────────────────────
+
+_embedder: BatchedEmbedder | None = None
+
+
+def _shared_client():
+    """The process-wide OpenAI client (one pooled connection for every job),
+    with the SDK's own retries: summary and embedding calls don't go through
+    `openai_client.chat`'s backoff. `with_options` keeps the same HTTP pool."""
+    from agents import openai_client  # agents/__init__ imports this module
+    return openai_client.get_client().with_options(max_retries=2)
+
+
+def _shared_embedder() -> BatchedEmbedder:
+    """One embedder for every summarizer, so concurrent jobs' queries share batches."""
+    global _embedder
+    if _embedder is None:
+        _embedder = BatchedEmbedder(_shared_client())
+    return _embedder
 
 
 class RAGSummarizer(BaseSummarizer):
     def __init__(self, docs: list[DocumentRecord] | None = None):
         self._docs = docs or []
-        self._index: faiss.IndexFlatIP | None = None
+        self._index: faiss.Index | None = None
         self._chunks: list[str] = []
+        self._keyword_index: _KeywordIndex | None = None
         self._use_embeddings = bool(settings.openai_api_key)
-        self._client = AsyncOpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
+        self._client = _shared_client() if settings.openai_api_key else None
+        self._embedder = _shared_embedder() if self._client else None
 
-    def build_index(self, docs: list[DocumentRecord]) -> None:
+    def _chunk_docs(self, docs: list[DocumentRecord]) -> None:
         self._docs = docs
         self._chunks = []
+        self._keyword_index = None
+        self._index = None
         for doc in docs:
             text_for_index = doc.metadata.get("condensed_text") or doc.raw_text
             self._chunks.extend(_chunk_text(text_for_index))
 
+    async def build_index_async(self, docs: list[DocumentRecord]) -> None:
+        """Chunk `docs` and embed the chunks into a FAISS index on the running loop.
+        Without embeddings (no key, or the build fails) retrieval falls back to keywords."""
+        self._chunk_docs(docs)
         if not self._chunks or not self._use_embeddings:
             return
-
-        import asyncio
+        # Same chunks embedded before: reuse the index, no embedding requests
+        cache_path = _index_cache_path(self._chunks)
+        if cache_path is not None:
+            self._index = await asyncio.to_thread(_load_cached_index, cache_path, len(self._chunks))
+            if self._index is not None:
+                return
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as pool:
-                    future = pool.submit(asyncio.run, self._build_faiss_index())
-                    future.result(timeout=30)
-            else:
-                loop.run_until_complete(self._build_faiss_index())
+            await self._build_faiss_index()
         except Exception:
             self._index = None
+        if cache_path is not None and self._index is not None:
+            await asyncio.to_thread(_store_index, cache_path, self._index)
+
+    def build_index(self, docs: list[DocumentRecord]) -> None:
+        """Blocking form of `build_index_async` for callers outside an event loop.
+        Inside a running loop it only chunks (keyword retrieval) — await
+        `build_index_async` there instead."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.build_index_async(docs))
+        else:
+            self._chunk_docs(docs)
 
     async def _build_faiss_index(self) -> None:
         """Build FAISS index using OpenAI embeddings (batched)."""
         if not self._client:
             return
         batch_size = 100
-        all_embeddings = []
-        for i in range(0, len(self._chunks), batch_size):
-            batch = self._chunks[i: i + batch_size]
-            resp = await self._client.embeddings.create(
-                model="text-embedding-3-small",
-                input=batch,
-            )
-            vecs = [e.embedding for e in resp.data]
-            all_embeddings.extend(vecs)
-
-        if not all_embeddings:
+        batches = [self._chunks[i: i + batch_size] for i in range(0, len(self._chunks), batch_size)]
+        if not batches:
             return
-        arr = np.array(all_embeddings, dtype=np.float32)
-        norms = np.linalg.norm(arr, axis=1, keepdims=True)
-        arr = arr / np.clip(norms, 1e-9, None)
-        dim = arr.shape[1]
-        self._index = faiss.IndexFlatIP(dim)
-        self._index.add(arr)
-
-    async def _retrieve(self, query: str, top_k: int = 5) -> list[str]:
-        if not self._chunks:
+        # All batches in flight at once (bounded), results kept in chunk order
+        sem = asyncio.Semaphore(_INDEX_EMBED_CONCURRENCY)
+
+        async def _one(batch: list[str]) -> np.ndarray:
+            async with sem:
+                return await self._embedder.embed_batch(batch)
+
+        # vstack returns a fresh float32 array, normalised in place
+        arr = np.vstack(await asyncio.gather(*(_one(b) for b in batches)))
+        faiss.normalize_L2(arr)
+        self._index = _make_index(arr)
+
+    def _keyword_retrieve(self, query: str, top_k: int) -> list[str]:
+        """Keyword-overlap fallback; the inverted index is built on first use."""
+        if self._keyword_index is None:
+            self._keyword_index = _KeywordIndex(self._chunks)
+        return [self._chunks[i] for i in self._keyword_index.search(query, top_k)]
+
+    async def _retrieve(self, queries: list[str] | str, top_k: int = 5) -> list[str]:
+        """
+        Up to `top_k` chunks for `queries`. Several queries are embedded together
+        and searched in one FAISS call; their hits are fused, each chunk ranked
+        by its best score across the queries.
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+        if not self._chunks or not queries:
             return []
         if self._index is None or not self._use_embeddings:
-            return _keyword_retrieve(self._chunks, query, top_k)
+            return self._keyword_retrieve(" ".join(queries), top_k)
         try:
-            resp = await self._client.embeddings.create(
-                model="text-embedding-3-small",
-                input=[query],
-            )
-            qvec = np.array(resp.data[0].embedding, dtype=np.float32)
-            qvec = qvec / (np.linalg.norm(qvec) + 1e-9)
-            qvec = qvec.reshape(1, -1)
-            _, indices = self._index.search(qvec, min(top_k, len(self._chunks)))
-            return [self._chunks[i] for i in indices[0] if i < len(self._chunks)]
+            # Concurrent embeds share one embeddings request; repeats hit the cache
+            vecs = await asyncio.gather(*(self._embedder.embed(q) for q in queries))
+            # vstack copies: cached vectors are read-only
+            qmat = np.vstack(vecs).astype(np.float32, copy=False)
+            faiss.normalize_L2(qmat)
+            if isinstance(self._index, faiss.IndexHNSW):
+                self._index.hnsw.efSearch = max(_HNSW_EF_SEARCH, top_k * 4)
+            scores, indices = self._index.search(qmat, min(top_k, len(self._chunks)))
+            best: dict[int, float] = {}
+            for i, score in zip(indices.ravel().tolist(), scores.ravel().tolist()):
+                # -1 marks a slot HNSW couldn't fill
+                if 0 <= i < len(self._chunks) and score > best.get(i, float("-inf")):
+                    best[i] = score
+            ranked = sorted(best, key=best.__getitem__, reverse=True)[:top_k]
+            return [self._chunks[i] for i in ranked]
         except Exception:
-            return _keyword_retrieve(self._chunks, query, top_k)
+            return self._keyword_retrieve(" ".join(queries), top_k)
 
     async def summarize(
         self,
@@ -201,14 +391,20 @@ class RAGSummarizer(BaseSummarizer):
         doc_types: list[str],
         depth: str = "standard",
         single_doc: bool = False,
+        on_token: Callable[[str], None] | None = None,
     ) -> tuple[str, list[SummarySection]]:
+        """
+        Summary text and its ## sections. The completion is streamed: each
+        content delta is passed to `on_token` as it arrives, and sections are
+        parsed once the stream ends.
+        """
         if not self._client:
             claims_text = "\n".join(f"• {c.text}" for c in resolved_claims[:20])
             full_summary = f"## Key Findings\n{claims_text}\n\n## Conclusion\nSummary generated without LLM (no OpenAI API key configured)."
             return full_summary, _parse_sections(full_summary)
 
         query = " ".join(c.text for c in resolved_claims[:10])
-        retrieved = await self._retrieve(query, top_k=settings.rag_top_k)
+        retrieved = await self._retrieve([query], top_k=settings.rag_top_k)
         context_block = "\n---\n".join(retrieved)
 
         max_claims = 10 if depth == "brief" else 30 if depth in ("detailed", "deep_research") else 20
@@ -216,14 +412,15 @@ class RAGSummarizer(BaseSummarizer):
         max_tokens = 500 if depth == "brief" else 3000 if depth == "deep_research" else 2000
 
         claims_text = "\n".join(f"• {c.text}" for c in resolved_claims[:max_claims])
-        conflict_text = ""
+        conflict_lines: list[str] = []
         if not single_doc and conflicts:
             for conf in conflicts[:max_conflicts]:
                 if conf.status == "resolved":
-                    conflict_text += f"\n[RESOLVED] {conf.topic}\n  → Winner: {conf.resolution}\n"
+                    conflict_lines.append(f"\n[RESOLVED] {conf.topic}\n  → Winner: {conf.resolution}\n")
                 else:
                     all_sides = "\n    ".join(f"- {c.text}" for c in conf.claims[:3])
-                    conflict_text += f"\n[UNRESOLVED] {conf.topic}\n  Conflicting claims:\n    {all_sides}\n"
+                    conflict_lines.append(f"\n[UNRESOLVED] {conf.topic}\n  Conflicting claims:\n    {all_sides}\n")
+        conflict_text = "".join(conflict_lines)
 
         user_msg = (
             f"RESOLVED CLAIMS:\n{claims_text}\n\n"
@@ -231,24 +428,37 @@ class RAGSummarizer(BaseSummarizer):
             + f"RETRIEVED CONTEXT PASSAGES:\n{context_block}"
         )
 
-        resp = await self._client.chat.completions.create(
-            model=settings.openai_model,
-            messages=[
+        from agents.openai_client import completion_slot  # agents/__init__ imports this module
+        params = {
+            "model": settings.openai_model,
+            "messages": [
                 {"role": "system", "content": _build_system_prompt(doc_types, depth, single_doc)},
-                {"role": "user", "content": user_msg[:14000]},
+                {"role": "user", "content": _truncate_prompt(user_msg)},
             ],
-            temperature=0.2,
-            max_tokens=max_tokens,
-        )
+            "temperature": 0.2,
+            "max_tokens": max_tokens,
+        }
+        pieces: list[str] = []
+        # Rate-limit budget and a concurrency slot for as long as the stream is read
+        async with completion_slot(params):
+            stream = await self._client.chat.completions.create(**params, stream=True)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content or ""
+                if piece:
+                    pieces.append(piece)
+                    if on_token:
+                        on_token(piece)
 
-        full_summary = resp.choices[0].message.content.strip()
+        full_summary = "".join(pieces).strip()
         sections = _parse_sections(full_summary)
         return full_summary, sections
 
 
 def _parse_sections(text: str) -> list[SummarySection]:
     """Parse ## Section headers from LLM output into SummarySection objects."""
-    parts = re.split(r"^##\s*", text, flags=re.MULTILINE)
+    parts = _SECTION_RE.split(text)
     sections = []
     for part in parts:
         if not part.strip():
@@ -257,7 +467,7 @@ def _parse_sections(text: str) -> list[SummarySection]:
         title = lines[0].strip()
         content = "\n".join(lines[1:]).strip()
         if title:
-            sections.append(SummarySection(title=title, content=content))
+            sections.append(SummarySection.from_trusted(title=title, content=content))
     if not sections:
-        sections = [SummarySection(title="Summary", content=text)]
+        sections = [SummarySection.from_trusted(title="Summary", content=text)]
     return sections
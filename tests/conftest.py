@@ -22,3 +22,10 @@ async def init_test_db():
     )
     yield
     # Cleanup unnecessary for mock client
+
+
+@pytest.fixture(scope="session")
+def bart_summarizer():
+    """One BartSummarizer shared by the BART tests (each patches `_get_pipe`)."""
+    from summarizer.bart_summarizer import BartSummarizer
+    return BartSummarizer()
@@ -68,3 +68,11 @@ async def test_classify_blog():
     from agents.classifier import classify_document
     result = await classify_document(BLOG_TEXT, "My thoughts on JS")
     assert result in ("blog_post", "unknown"), f"Unexpected: {result}"
+
+
+def test_keyword_score_counts_overlapping_keywords():
+    """'subsection' also contains the 'section' keyword — both should count, once each."""
+    from agents.classifier import _keyword_score, _SIGNALS
+    scores = _keyword_score("subsection subsection")
+    n_keywords = len(_SIGNALS["legal_document"]["keywords"])
+    assert scores["legal_document"] == pytest.approx(0.4 * 2 / n_keywords)
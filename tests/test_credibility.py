@@ -100,3 +100,40 @@ async def test_news_credibility_low_trust_source():
     )
     score = await agent.score_credibility(doc)
     assert score.overall <= 0.35, f"Infowars should score low, got {score.overall}"
+
+
+@pytest.mark.asyncio
+async def test_source_authorities_batch_lookup():
+    from agents import source_authority as sa
+    urls = [
+        "https://www.reuters.com/world/a",
+        "https://blog.example-niche.com/1",
+        "https://example-niche.com/2",
+        None,
+    ]
+    with patch.object(sa, "_cache_get_many", new_callable=AsyncMock, return_value={}), \
+         patch.object(sa, "_cache_set_many", new_callable=AsyncMock) as cache_set, \
+         patch.object(sa, "_tier2_openpagerank_many", new_callable=AsyncMock,
+                      return_value={"example-niche.com": 0.61}) as tier2:
+        scores = await sa.get_source_authorities(urls)
+
+    assert scores == {
+        "https://www.reuters.com/world/a": 0.94,
+        "https://blog.example-niche.com/1": 0.61,
+        "https://example-niche.com/2": 0.61,
+    }
+    tier2.assert_awaited_once_with(["example-niche.com"])
+    cache_set.assert_awaited_once_with({"example-niche.com": (0.61, "openpagerank")})
+
+
+def test_research_score_many_matches_scalar_scores():
+    from agents.research_agent import score_many, _recency_score, _citation_score, _hindex_score
+    metas = [
+        {},
+        {"year": 2019, "citationCount": 250, "authors": [{"hIndex": 12}, {"hIndex": 45}]},
+        {"year": 2001, "citationCount": 0, "authors": [{"name": "no index"}]},
+    ]
+    for meta, subs in zip(metas, score_many(metas)):
+        assert subs["recency"] == pytest.approx(_recency_score(meta.get("year")))
+        assert subs["citation"] == pytest.approx(_citation_score(meta.get("citationCount")))
+        assert subs["hindex"] == pytest.approx(_hindex_score(meta.get("authors", [])))
@@ -0,0 +1,255 @@
+"""Tests for packed section-by-section paper summarization."""
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+
+@pytest.fixture(autouse=True)
+def _sectioned_path(monkeypatch):
+    """The test papers are short; make them take the sectioned path."""
+    monkeypatch.setattr("utils.hierarchical_summarizer._SINGLE_PASS_MAX_TOKENS", 0)
+
+
+def _paper(tag: str) -> str:
+    """A five-section paper; `tag` keeps each test's prompts (and cache keys) distinct."""
+    return "\n\n".join(
+        f"{header}\n" + " ".join(f"{tag}{word}{i}" for i in range(100))
+        for header, word in [
+            ("Abstract", "abs"),
+            ("1. Introduction", "intro"),
+            ("2. Methods", "meth"),
+            ("3. Results", "res"),
+            ("4. Conclusion", "conc"),
+        ]
+    )
+
+
+def _client(*contents: str) -> MagicMock:
+    responses = []
+    for content in contents:
+        resp = MagicMock()
+        resp.choices = [MagicMock(message=MagicMock(content=content))]
+        responses.append(resp)
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=responses)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_sections_are_summarized_in_one_request():
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    packed = {f"s{i}": f"summary {i}" for i in range(1, 6)}
+    client = _client(orjson.dumps(packed).decode())
+
+    result = await hierarchical_summarize(_paper("packed"), client)
+
+    assert client.chat.completions.create.await_count == 1
+    kwargs = client.chat.completions.create.await_args.kwargs
+    assert kwargs["response_format"] == {"type": "json_object"}
+    assert kwargs["messages"][1]["content"].count("<<<SECTION") == 5
+    assert result["section_count"] == 5
+    assert result["condensed_text"].split("\n\n---\n\n") == [
+        f"## {label}\n\nsummary {i}"
+        for i, label in enumerate(["Abstract", "Introduction", "Methods", "Results", "Conclusion"], 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sections_missing_from_packed_reply_fall_back_to_single_calls():
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    packed = {"s1": "a", "s2": "b", "s3": "c", "s5": "e"}
+    client = _client(orjson.dumps(packed).decode(), "d (single)")
+
+    result = await hierarchical_summarize(_paper("partial"), client)
+
+    assert client.chat.completions.create.await_count == 2
+    assert "## Results\n\nd (single)" in result["condensed_text"]
+    assert result["condensed_text"].endswith("## Conclusion\n\ne")
+
+
+@pytest.mark.asyncio
+async def test_repeat_paper_is_served_from_cache():
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    packed = {f"s{i}": f"cached {i}" for i in range(1, 6)}
+    client = _client(orjson.dumps(packed).decode())
+
+    first = await hierarchical_summarize(_paper("repeat"), client)
+    second = await hierarchical_summarize(_paper("repeat"), client)
+
+    assert client.chat.completions.create.await_count == 1
+    assert first["condensed_text"] == second["condensed_text"]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_groups_as_they_complete():
+    import asyncio
+    import re
+    from utils.hierarchical_summarizer import hierarchical_summarize_stream
+
+    # ~2,500-token sections: three fit one packed request, the rest go in a second
+    paper = "\n\n".join(
+        f"{header}\n" + " ".join(f"stream{header}{i}" for i in range(2500))
+        for header in ["Abstract", "Introduction", "Methods", "Results", "Conclusion"]
+    )
+
+    async def _create(**params):
+        user = params["messages"][1]["content"]
+        if "name=abstract" in user:
+            await asyncio.sleep(0.05)  # first group finishes last
+        ids = re.findall(r"<<<SECTION id=(\w+) name=(\w+)", user)
+        resp = MagicMock()
+        resp.choices = [MagicMock(message=MagicMock(content=orjson.dumps({sid: name for sid, name in ids}).decode()))]
+        return resp
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=_create)
+
+    items = [item async for item in hierarchical_summarize_stream(paper, client)]
+    assert client.chat.completions.create.await_count == 2
+    assert [i for i, _, _ in items] == [3, 4, 0, 1, 2]
+    assert [summary.split("\n\n")[1] for _, _, summary in items] == [
+        "results", "conclusion", "abstract", "introduction", "methods",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_short_sections_kept_verbatim_and_back_matter_skipped():
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    short = " ".join(f"brief{i}" for i in range(40))
+    paper = _paper("verbatim") + f"\n\nClosing Remarks\n{short}\n\nAcknowledgements\n" + " ".join(["thanks"] * 50)
+    packed = {f"s{i}": f"summary {i}" for i in range(1, 6)}
+    client = _client(orjson.dumps(packed).decode())
+
+    result = await hierarchical_summarize(paper, client)
+
+    assert client.chat.completions.create.await_count == 1
+    assert client.chat.completions.create.await_args.kwargs["messages"][1]["content"].count("<<<SECTION") == 5
+    assert result["section_count"] == 6
+    assert result["verbatim_section_count"] == 1
+    assert result["condensed_text"].endswith(f"## Closing Remarks\n\n{short}")
+    assert "thanks" not in result["condensed_text"]
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_used_when_none_given(monkeypatch):
+    import agents.openai_client
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    packed = {f"s{i}": f"shared {i}" for i in range(1, 6)}
+    client = _client(orjson.dumps(packed).decode())
+    monkeypatch.setattr(agents.openai_client, "get_client", lambda: client)
+
+    result = await hierarchical_summarize(_paper("shared"))
+
+    assert client.chat.completions.create.await_count == 1
+    assert result["condensed_text"].startswith("## Abstract\n\nshared 1")
+
+
+def test_keyword_summary_keeps_first_200_words_per_section():
+    from utils.hierarchical_summarizer import keyword_section_summary
+    long_body = "\n".join(f"w{i}  x{i}" for i in range(500))
+    paper = f"Abstract\n{long_body}\n\nReferences\n" + " ".join(["[1] cite"] * 50)
+
+    summary = keyword_section_summary(paper)
+
+    assert summary == "## Abstract\n" + " ".join(f"w{i} x{i}" for i in range(100))
+
+
+@pytest.mark.asyncio
+async def test_batch_summarize_sends_all_papers_in_one_batch():
+    import re
+    from types import SimpleNamespace
+    from utils.hierarchical_summarizer import hierarchical_summarize_batch
+    uploads = []
+
+    async def _files_create(file, purpose):
+        uploads.append(file[1])
+        return SimpleNamespace(id="file-in")
+
+    async def _files_content(file_id):
+        rows = []
+        for line in uploads[-1].split(b"\n"):
+            req = orjson.loads(line)
+            ids = re.findall(r"<<<SECTION id=(\w+)", req["body"]["messages"][1]["content"])
+            tag = re.search(r"\n(\w+?)abs0 ", req["body"]["messages"][1]["content"]).group(1)
+            content = orjson.dumps({sid: f"{tag} {sid}" for sid in ids}).decode()
+            rows.append(orjson.dumps({
+                "custom_id": req["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+            }))
+        return SimpleNamespace(text=b"\n".join(rows).decode())
+
+    client = MagicMock()
+    client.files.create = AsyncMock(side_effect=_files_create)
+    client.files.content = AsyncMock(side_effect=_files_content)
+    client.batches.create = AsyncMock(return_value=SimpleNamespace(
+        id="batch-1", status="completed", output_file_id="file-out",
+    ))
+
+    results = await hierarchical_summarize_batch(
+        [("a", _paper("batcha")), ("b", _paper("batchb"))], client, linger=0.01,
+    )
+
+    assert client.batches.create.await_count == 1
+    assert len(uploads[0].split(b"\n")) == 2
+    client.chat.completions.create.assert_not_called()
+    assert results["a"]["condensed_text"].startswith("## Abstract\n\nbatcha s1")
+    assert results["b"]["condensed_text"].endswith("## Conclusion\n\nbatchb s5")
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_and_a_failed_section_keeps_its_text(monkeypatch, caplog):
+    import httpx
+    from openai import RateLimitError
+    from tenacity import wait_none
+    import agents.openai_client
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    monkeypatch.setattr(agents.openai_client, "chat", agents.openai_client.chat.retry_with(wait=wait_none()))
+
+    def _rate_limited():
+        response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+        return RateLimitError("rate limited", response=response, body=None)
+
+    packed = {"s1": "a", "s2": "b", "s3": "c", "s5": "e"}
+    reply = _client(orjson.dumps(packed).decode()).chat.completions.create.side_effect
+    client = MagicMock()
+    # Packed call: one 429 then the reply; the missing section's call: 429 on every attempt
+    client.chat.completions.create = AsyncMock(side_effect=[
+        _rate_limited(), *reply, *(_rate_limited() for _ in range(3)),
+    ])
+
+    result = await hierarchical_summarize(_paper("retry"), client)
+
+    assert client.chat.completions.create.await_count == 5
+    assert result["condensed_text"].startswith("## Abstract\n\na")
+    assert "## Results\n\nretryres0 retryres1" in result["condensed_text"]
+    assert "Summarizing section 'Results' failed after 3 attempt(s)" in caplog.text
+
+@pytest.mark.asyncio
+async def test_short_paper_is_passed_through_whole(monkeypatch):
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    monkeypatch.setattr("utils.hierarchical_summarizer._SINGLE_PASS_MAX_TOKENS", 6000)
+    client = _client()
+    paper = _paper("single_pass")
+
+    result = await hierarchical_summarize(paper, client)
+
+    client.chat.completions.create.assert_not_called()
+    assert result["condensed_text"] == paper
+    assert result["was_hierarchical"] is False
+    assert result["section_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_packed_request_does_not_fan_out(caplog):
+    import httpx
+    from openai import AuthenticationError
+    from utils.hierarchical_summarizer import hierarchical_summarize
+    response = httpx.Response(401, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=AuthenticationError("bad key", response=response, body=None))
+
+    result = await hierarchical_summarize(_paper("authfail"), client)
+
+    assert client.chat.completions.create.await_count == 1
+    assert result["condensed_text"].startswith("## Abstract\n\nauthfailabs0 authfailabs1")
+    assert "Packed summary of 5 sections failed after 1 attempt(s)" in caplog.text
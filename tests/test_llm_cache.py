@@ -0,0 +1,67 @@
+"""Tests for the content-hash LLM response cache."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def _chat(content: str) -> AsyncMock:
+    resp = MagicMock()
+    resp.choices = [MagicMock(message=MagicMock(content=content))]
+    return AsyncMock(return_value=resp)
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_hit_cache():
+    from agents.llm_cache import cached_chat_completion
+    params = {"model": "m", "messages": [{"role": "user", "content": "cache-me-1"}], "temperature": 0}
+    with patch("agents.openai_client.chat", _chat('{"claims": ["a"]}')) as chat:
+        first = await cached_chat_completion(**params)
+        second = await cached_chat_completion(**params)
+    assert first == second == '{"claims": ["a"]}'
+    assert chat.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_different_messages_miss_cache():
+    from agents.llm_cache import cached_chat_completion
+    with patch("agents.openai_client.chat", _chat("x")) as chat:
+        await cached_chat_completion(model="m", messages=[{"role": "user", "content": "cache-me-2"}])
+        await cached_chat_completion(model="m", messages=[{"role": "user", "content": "cache-me-3"}])
+    assert chat.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    from agents.llm_cache import cached_chat_completion
+    resp = MagicMock()
+    resp.choices = [MagicMock(message=MagicMock(content="shared"))]
+
+    async def _slow(**_):
+        await asyncio.sleep(0.01)
+        return resp
+
+    params = {"model": "m", "messages": [{"role": "user", "content": "cache-me-4"}], "temperature": 0}
+    with patch("agents.openai_client.chat", AsyncMock(side_effect=_slow)) as chat:
+        results = await asyncio.gather(*(cached_chat_completion(**params) for _ in range(3)))
+    assert results == ["shared"] * 3
+    assert chat.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescers_keep_separate_key_spaces():
+    from utils.inflight import Coalescer
+    calls: list[str] = []
+
+    def _work(name: str):
+        async def _factory() -> str:
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+        return _factory
+
+    first, second = Coalescer(), Coalescer()
+    results = await asyncio.gather(
+        first.run("k", _work("first")), first.run("k", _work("dup")), second.run("k", _work("second")),
+    )
+    assert results == ["first", "first", "second"]
+    assert calls == ["first", "second"]
@@ -0,0 +1,41 @@
+"""Tests for research-paper section detection."""
+import pytest
+from utils.paper_chunker import _label_to_canonical, split_into_sections
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("Abstract", "abstract"),
+    ("RELATED   WORK", "related_work"),
+    ("Materials and Methods", "methods"),
+    ("Results and Discussion", "results"),
+    ("Discussion of Results", "results"),   # list priority, not position in the label
+    ("Models", "other"),                    # whole words only
+    ("Future Work", "conclusion"),
+    ("Acknowledgements", "acknowledgments"),
+    ("Appendix", "other"),
+])
+def test_label_to_canonical(label, expected):
+    assert _label_to_canonical(label) == expected
+
+
+def test_split_into_sections_merges_short_sections():
+    body = " ".join(f"w{i}" for i in range(40))
+    text = f"arXiv preprint, 2024\n\nAbstract\n{body}\n\n2. Methods\n{body}\n\nFigure Caption\nshort\n\n3. Results\n{body}"
+    sections = split_into_sections(text)
+    assert [(s.name, s.label) for s in sections] == [
+        ("preamble", "Preamble"), ("abstract", "Abstract"), ("methods", "Methods"), ("results", "Results"),
+    ]
+    assert sections[2].text.endswith("short")
+    assert sections[2].word_count == 41
+
+
+def test_split_into_sections_reuses_repeat_splits(monkeypatch):
+    import utils.paper_chunker as paper_chunker
+    body = " ".join(f"w{i}" for i in range(40))
+    text = f"Abstract\n{body}\n\n1. Introduction\n{body}"
+    first = split_into_sections(text)
+
+    monkeypatch.setattr(paper_chunker, "_split_into_sections", lambda *a: pytest.fail("re-scanned"))
+    assert split_into_sections(text) == first
+    with pytest.raises(pytest.fail.Exception):
+        split_into_sections(text, min_section_words=10)
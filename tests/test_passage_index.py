@@ -0,0 +1,35 @@
+"""Tests for the /qa passage retrieval index."""
+import numpy as np
+from db.models import DocumentRecord
+from utils import passage_index
+
+_TOPICS = ["apple", "banana", "cherry"]
+
+
+def _fake_encode(texts):
+    # One axis per topic word; normalised like the real encoder
+    arr = np.array([[t.count(w) + 0.01 for w in _TOPICS] for t in texts], dtype=np.float32)
+    return arr / np.linalg.norm(arr, axis=1, keepdims=True)
+
+
+def test_split_passages_overlaps_windows():
+    words = [f"w{i}" for i in range(400)]
+    passages = passage_index.split_passages(" ".join(words))
+    step = passage_index.PASSAGE_WORDS - passage_index.PASSAGE_OVERLAP
+    assert len(passages) == len(range(0, 400, step))
+    assert passages[1].split()[0] == words[step]
+
+
+def test_top_passages_ranks_across_docs(monkeypatch):
+    monkeypatch.setattr(passage_index, "_encode", _fake_encode)
+    monkeypatch.setattr(passage_index, "PASSAGE_WORDS", 3)
+    monkeypatch.setattr(passage_index, "PASSAGE_OVERLAP", 0)
+    docs = [
+        DocumentRecord(raw_text="apple apple apple banana banana banana"),
+        DocumentRecord(raw_text="cherry cherry cherry apple apple cherry"),
+    ]
+    passage_index.index_passages(docs)
+    assert all(passage_index.has_passage_index(d) for d in docs)
+
+    hits = passage_index.top_passages("apple", docs, k=2)
+    assert hits == [(0, "apple apple apple"), (1, "apple apple cherry")]
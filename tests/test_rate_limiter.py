@@ -0,0 +1,52 @@
+"""Tests for the RPM/TPM token bucket."""
+import asyncio
+import time
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_until_refilled():
+    from utils.rate_limiter import AsyncTokenBucket
+    bucket = AsyncTokenBucket(rpm=1000, tpm=6000)  # 100 tokens/s
+    await bucket.acquire(6000)  # drains the token budget
+    start = time.monotonic()
+    await bucket.acquire(10)
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_request_budget_admits_in_order():
+    from utils.rate_limiter import AsyncTokenBucket
+    bucket = AsyncTokenBucket(rpm=600, tpm=10**6)  # 10 requests/s after the burst
+    for _ in range(600):
+        await bucket.acquire()
+    order: list[int] = []
+
+    async def _request(i: int) -> None:
+        await bucket.acquire(1)
+        order.append(i)
+
+    start = time.monotonic()
+    await asyncio.gather(*(_request(i) for i in range(3)))
+    assert order == [0, 1, 2]
+    assert time.monotonic() - start >= 0.25
+
+
+@pytest.mark.asyncio
+async def test_chat_completions_are_charged_to_the_bucket(monkeypatch):
+    from unittest.mock import AsyncMock, MagicMock
+    import agents.openai_client as openai_client
+    charged: list[int] = []
+
+    class _Bucket:
+        async def acquire(self, tokens: int = 0) -> None:
+            charged.append(tokens)
+
+    monkeypatch.setattr(openai_client, "openai_limiter", lambda: _Bucket())
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value="resp")
+
+    messages = [{"role": "user", "content": "one two three"}]
+    assert await openai_client.chat(client=client, model="m", messages=messages, max_tokens=50) == "resp"
+    assert charged == [openai_client.count_tokens("one two three") + 50]
+    client.chat.completions.create.assert_awaited_once_with(model="m", messages=messages, max_tokens=50)
@@ -1,6 +1,6 @@
 """Tests for conflict resolution strategies."""
 import pytest
-from db.models import Claim, CredibilityScore
+from db.models import Claim
 from conflict.strategies import (
     weighted_vote, majority_vote, highest_credibility_wins, conservative
 )
@@ -16,15 +16,15 @@ CLAIMS = [
 ]
 
 CRED_MAP_CLEAR = {
-    DOC_A: CredibilityScore(overall=0.90),
-    DOC_B: CredibilityScore(overall=0.40),
-    DOC_C: CredibilityScore(overall=0.55),
+    DOC_A: 0.90,
+    DOC_B: 0.40,
+    DOC_C: 0.55,
 }
 
 CRED_MAP_CLOSE = {
-    DOC_A: CredibilityScore(overall=0.75),
-    DOC_B: CredibilityScore(overall=0.72),
-    DOC_C: CredibilityScore(overall=0.70),
+    DOC_A: 0.75,
+    DOC_B: 0.72,
+    DOC_C: 0.70,
 }
 
 
@@ -42,9 +42,9 @@ def test_weighted_vote_too_close():
 
 def test_majority_vote_two_high_trust():
     high_cred = {
-        DOC_A: CredibilityScore(overall=0.90),
-        DOC_B: CredibilityScore(overall=0.88),
-        DOC_C: CredibilityScore(overall=0.20),
+        DOC_A: 0.90,
+        DOC_B: 0.88,
+        DOC_C: 0.20,
     }
     result = majority_vote(CLAIMS, high_cred, high_trust_threshold=0.75)
     assert result.status == "resolved"
@@ -66,3 +66,20 @@ def test_conservative_always_unresolved():
 def test_empty_claims():
     result = weighted_vote([], CRED_MAP_CLEAR)
     assert result.status == "unresolved"
+
+
+def test_cluster_claims_groups_similar_vectors(monkeypatch):
+    import numpy as np
+    from conflict import resolver
+
+    vectors = {"a": [1.0, 0.0], "a2": [0.99, 0.14], "b": [0.0, 1.0], "a3": [0.95, 0.31]}
+
+    class _Encoder:
+        def encode(self, texts, **_):
+            arr = np.array([vectors[t] for t in texts])
+            return arr / np.linalg.norm(arr, axis=1, keepdims=True)
+
+    monkeypatch.setattr(resolver, "_get_model", lambda: _Encoder())
+    claims = [Claim(text=t, source_doc_id=DOC_A) for t in vectors]
+    clusters = resolver._cluster_claims(claims, threshold=0.9)
+    assert [[c.text for c in cluster] for cluster in clusters] == [["a", "a2", "a3"], ["b"]]
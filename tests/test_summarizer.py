@@ -22,16 +22,37 @@ SAMPLE_CONFLICT = Conflict(
 )
 
 
+class _WordTokenizer:
+    """Stand-in for the BART tokenizer: one token per whitespace-separated word."""
+    model_max_length = 1024
+
+    def __init__(self):
+        self._vocab: list[str] = []
+
+    def __call__(self, text, add_special_tokens=True):
+        ids = []
+        for word in text.split():
+            self._vocab.append(word)
+            ids.append(len(self._vocab) - 1)
+        return {"input_ids": ids}
+
+    def batch_decode(self, windows, skip_special_tokens=True):
+        return [" ".join(self._vocab[i] for i in window) for window in windows]
+
+
+def _mock_pipe(summary: str) -> MagicMock:
+    pipe = MagicMock()
+    pipe.return_value = [{"summary_text": summary}]
+    pipe.tokenizer = _WordTokenizer()
+    return pipe
+
+
 @pytest.mark.asyncio
 @patch("summarizer.bart_summarizer._get_pipe")
-async def test_bart_summarizer_returns_nonempty(mock_get_pipe):
+async def test_bart_summarizer_returns_nonempty(mock_get_pipe, bart_summarizer):
     """BART summarizer should produce non-empty output without an API key."""
-    mock_pipe = MagicMock()
-    mock_pipe.return_value = [{"summary_text": "This is a sufficiently long mocked summary from the BART model. " * 3}]
-    mock_get_pipe.return_value = mock_pipe
-    from summarizer.bart_summarizer import BartSummarizer
-    summarizer = BartSummarizer()
-    full, sections = await summarizer.summarize(SAMPLE_CLAIMS, [SAMPLE_CONFLICT], ["research_paper"])
+    mock_get_pipe.return_value = _mock_pipe("This is a sufficiently long mocked summary from the BART model. " * 3)
+    full, sections = await bart_summarizer.summarize(SAMPLE_CLAIMS, [SAMPLE_CONFLICT], ["research_paper"])
     assert isinstance(full, str)
     assert len(full) > 50, "Summary should be non-trivially long"
     assert len(sections) >= 2, "Should produce at least Key Findings and Conflicts sections"
@@ -39,14 +60,10 @@ async def test_bart_summarizer_returns_nonempty(mock_get_pipe):
 
 @pytest.mark.asyncio
 @patch("summarizer.bart_summarizer._get_pipe")
-async def test_bart_summarizer_conflict_in_output(mock_get_pipe):
+async def test_bart_summarizer_conflict_in_output(mock_get_pipe, bart_summarizer):
     """Conflict information should appear in the Conflicts section."""
-    mock_pipe = MagicMock()
-    mock_pipe.return_value = [{"summary_text": "Mocked summary."}]
-    mock_get_pipe.return_value = mock_pipe
-    from summarizer.bart_summarizer import BartSummarizer
-    summarizer = BartSummarizer()
-    _, sections = await summarizer.summarize(SAMPLE_CLAIMS, [SAMPLE_CONFLICT], ["news_article"])
+    mock_get_pipe.return_value = _mock_pipe("Mocked summary.")
+    _, sections = await bart_summarizer.summarize(SAMPLE_CLAIMS, [SAMPLE_CONFLICT], ["news_article"])
     conflict_section = next((s for s in sections if "conflict" in s.title.lower()), None)
     assert conflict_section is not None
     assert len(conflict_section.content) > 10
@@ -54,21 +71,35 @@ async def test_bart_summarizer_conflict_in_output(mock_get_pipe):
 
 @pytest.mark.asyncio
 @patch("summarizer.bart_summarizer._get_pipe")
-async def test_bart_summarizer_research_adds_methodology(mock_get_pipe):
-    mock_pipe = MagicMock()
-    mock_pipe.return_value = [{"summary_text": "Mocked summary."}]
-    mock_get_pipe.return_value = mock_pipe
-    from summarizer.bart_summarizer import BartSummarizer
+async def test_bart_summarizer_research_adds_methodology(mock_get_pipe, bart_summarizer):
+    mock_get_pipe.return_value = _mock_pipe("Mocked summary.")
     method_claim = Claim(
         text="We used a randomized controlled trial methodology with 500 participants over 12 months.",
         source_doc_id="doc-1"
     )
-    summarizer = BartSummarizer()
-    _, sections = await summarizer.summarize([method_claim], [], ["research_paper"])
+    _, sections = await bart_summarizer.summarize([method_claim], [], ["research_paper"])
     titles = [s.title for s in sections]
     assert "Methodology" in titles, f"Research docs should have Methodology section. Got: {titles}"
 
 
+@pytest.mark.asyncio
+@patch("summarizer.bart_summarizer._get_pipe")
+async def test_bart_conclusion_without_periods(mock_get_pipe, bart_summarizer):
+    mock_get_pipe.return_value = _mock_pipe("Mocked summary without a full stop")
+    _, sections = await bart_summarizer.summarize(SAMPLE_CLAIMS, [], ["news_article"])
+    conclusion = next(s for s in sections if s.title == "Conclusion")
+    assert conclusion.content == "Mocked summary without a full stop"
+
+
+def test_bart_token_chunks_cover_text_with_overlap():
+    from summarizer.bart_summarizer import _token_chunks, _CHUNK_STRIDE_TOKENS
+    words = [f"w{i}" for i in range(2500)]
+    chunks = _token_chunks(_WordTokenizer(), " ".join(words))
+    assert [len(c.split()) for c in chunks] == [1022, 1022, 584]
+    assert chunks[1].split()[0] == words[1022 - _CHUNK_STRIDE_TOKENS]
+    assert chunks[-1].split()[-1] == words[-1]
+
+
 @pytest.mark.asyncio
 @pytest.mark.skipif(
     not __import__("os").environ.get("OPENAI_API_KEY"),
@@ -83,7 +114,98 @@ async def test_rag_summarizer_returns_sections():
         doc_type="news_article",
     )
     summarizer = RAGSummarizer()
-    summarizer.build_index([doc])
+    await summarizer.build_index_async([doc])
     full, sections = await summarizer.summarize(SAMPLE_CLAIMS, [], ["news_article"])
     assert len(full) > 50
     assert len(sections) >= 1
+
+
+@pytest.mark.asyncio
+async def test_batched_embedder_coalesces_and_caches():
+    import asyncio
+    from unittest.mock import AsyncMock
+    from summarizer.embedder import BatchedEmbedder
+
+    def _create(model, input):
+        resp = MagicMock()
+        resp.data = [MagicMock(embedding=[float(len(t)), 1.0]) for t in input]
+        return resp
+
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(side_effect=_create)
+    embedder = BatchedEmbedder(client, model="test-embed-batching")
+
+    queries = ["q-one", "q-three", "q-one"]
+    vecs = await asyncio.gather(*(embedder.embed(q) for q in queries))
+    assert [v[0] for v in vecs] == [5.0, 7.0, 5.0]
+    assert client.embeddings.create.await_count == 1
+    assert client.embeddings.create.await_args.kwargs["input"] == ["q-one", "q-three"]
+
+    # Cached now: no further request
+    cached = await embedder.embed_batch(["q-three", "q-one"])
+    assert cached[:, 0].tolist() == [7.0, 5.0]
+    assert client.embeddings.create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_rag_summarizer_streams_tokens(monkeypatch):
+    from unittest.mock import AsyncMock
+    import agents.openai_client as openai_client
+    from summarizer.rag_summarizer import RAGSummarizer
+
+    charged: list[int] = []
+
+    class _Bucket:
+        async def acquire(self, tokens: int = 0) -> None:
+            charged.append(tokens)
+
+    monkeypatch.setattr(openai_client, "openai_limiter", lambda: _Bucket())
+
+    pieces = ["## Key Findings\n", "Exercise helps.", "\n## Conclusion\n", "Move daily."]
+
+    async def _stream():
+        for piece in pieces:
+            chunk = MagicMock()
+            chunk.choices = [MagicMock(delta=MagicMock(content=piece))]
+            yield chunk
+
+    summarizer = RAGSummarizer()
+    summarizer._client = MagicMock()
+    summarizer._client.chat.completions.create = AsyncMock(return_value=_stream())
+
+    received: list[str] = []
+    full, sections = await summarizer.summarize(SAMPLE_CLAIMS, [], ["news_article"], on_token=received.append)
+    assert received == pieces
+    assert full == "".join(pieces).strip()
+    assert [s.title for s in sections] == ["Key Findings", "Conclusion"]
+    kwargs = summarizer._client.chat.completions.create.await_args.kwargs
+    assert kwargs["stream"] is True
+    assert charged == [openai_client._request_tokens(kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_rag_index_is_reused_from_disk_cache(tmp_path, monkeypatch):
+    from unittest.mock import AsyncMock
+    import numpy as np
+    from config import settings
+    from db.models import DocumentRecord
+    from summarizer.rag_summarizer import RAGSummarizer
+
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(settings, "faiss_cache_dir", str(tmp_path))
+
+    async def _embed_batch(texts):
+        return np.array([[float(len(t)), 1.0, 0.5] for t in texts], dtype=np.float32)
+
+    doc = DocumentRecord(doc_id="faiss-cache-doc", raw_text="cached index words " * 400)
+    first, second = RAGSummarizer(), RAGSummarizer()
+    for summarizer in (first, second):
+        summarizer._embedder = MagicMock()
+        summarizer._embedder.embed_batch = AsyncMock(side_effect=_embed_batch)
+
+    await first.build_index_async([doc])
+    assert len(list(tmp_path.glob("*.faiss"))) == 1
+
+    await second.build_index_async([doc])
+    second._embedder.embed_batch.assert_not_awaited()
+    assert second._index.ntotal == first._index.ntotal == len(second._chunks)
@@ -0,0 +1,49 @@
+"""
+utils/cpu_pool.py
+
+Process pool for CPU-bound text work (section splitting, keyword summaries)
+on large documents, so regex scans over a 400 KB paper don't block the event
+loop while other docs are waiting on S2/OpenAI I/O. Threads wouldn't help here:
+the regex engine holds the GIL.
+
+Small inputs run inline — shipping them to a worker costs more than the work.
+"""
+from __future__ import annotations
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# Texts shorter than this are processed on the calling thread
+OFFLOAD_MIN_CHARS = 100_000
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """The shared pool, created on first use. Workers are spawned, not forked,
+    so they never inherit the parent's event loop or model threads."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_text_job(fn: Callable[..., T], text: str, *args) -> T:
+    """`fn(text, *args)`, in the process pool when `text` is large. `fn` must be importable (picklable)."""
+    if len(text) < OFFLOAD_MIN_CHARS:
+        return fn(text, *args)
+    return await asyncio.get_running_loop().run_in_executor(get_cpu_pool(), fn, text, *args)
+
+
+def shutdown_cpu_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -5,15 +5,37 @@ Summarizes a long research paper section-by-section, then combines the section
 summaries into a condensed representation (~1,500–2,500 words) for downstream
 RAG retrieval and claim extraction.
 
+Sections are packed into as few requests as fit `_PACKED_MAX_INPUT_TOKENS`
+(usually one per paper): every section goes in one user message and the model
+returns a JSON object of per-section summaries, so the system prompt and the
+round trip are paid once rather than per section. Sections the packed reply
+misses are retried one at a time.
+
+Callers that don't pass a client get the process-wide one from
+agents/openai_client.py, so every section call of every paper reuses the same
+pooled HTTP/2 connections rather than paying a TCP+TLS handshake each.
+
+Every request goes through the LLM response cache (agents/llm_cache.py), keyed
+on its full parameters: re-summarizing a paper — or a section — already seen
+skips the call.
+
 GPT budget per run (gpt-4o-mini, $0.15/M input):
-    – Each section call:  ~600–1,500 tokens → ~$0.0001
-    – Typical 7-section paper: ~$0.001 total
+    – Typical 7-section paper, one packed call: ~5,000–9,000 tokens → ~$0.001
     – 3 papers: ~$0.003
 """
 from __future__ import annotations
 import asyncio
-from utils.paper_chunker import split_into_sections, truncate_to_tokens, PaperSection
+import logging
+from itertools import islice
+from typing import AsyncIterator
+import orjson
+from utils.paper_chunker import (
+    split_into_sections, truncate_to_tokens, count_tokens, PaperSection,
+    _MAX_CHARS_PER_TOKEN, _WORD_RE,
+)
+from utils.cpu_pool import run_text_job
 
+logger = logging.getLogger(__name__)
 
 # Section-specific prompts tuned to extract the most useful information
 _SECTION_PROMPTS: dict[str, str] = {
@@ -61,66 +83,297 @@ _SECTION_PROMPTS: dict[str, str] = {
 }
 
 
+_SYSTEM_PROMPT = (
+    "You are a scientific research assistant. Be concise and precise. "
+    "Preserve key numbers, model names, and technical terms exactly."
+)
+
+# Single-section request pieces, built once per section name: the shared system
+# message leads every request (a byte-identical prefix the provider's prompt
+# cache can reuse) and each user message only fills in label and body
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
+_USER_TEMPLATES: dict[str, str] = {
+    name: "SECTION: {label}\n\n{body}\n\nTask: " + task
+    for name, task in _SECTION_PROMPTS.items()
+}
+
+# One fixed system prompt for every packed request: the full task table, not
+# just the sections present, so it is identical across papers
+_PACKED_SYSTEM_PROMPT = (
+    _SYSTEM_PROMPT
+    + "\n\nYou will receive several sections of one research paper, each delimited as:\n"
+    "<<<SECTION id=ID name=NAME label=LABEL>>>\n...section text...\n<<<END>>>\n\n"
+    "Summarize every section independently, following the task for its NAME below. "
+    'Return a JSON object mapping each section ID to its summary text, e.g. {"s1": "...", "s2": "..."}.\n\n'
+    "Tasks by section NAME:\n"
+    + "\n".join(f"- {name}: {task}" for name, task in _SECTION_PROMPTS.items())
+)
+_PACKED_SYSTEM_MESSAGE = {"role": "system", "content": _PACKED_SYSTEM_PROMPT}
+
+_SECTION_SUMMARY_TOKENS = 400  # keep section summaries tight (~300 words each)
+# Section text tokens per packed request
+_PACKED_MAX_INPUT_TOKENS = 8000
+
+
+async def _create_completion(openai_client, params: dict) -> str:
+    """One `chat.completions.create` on `openai_client` via
+    `agents.openai_client.chat`: rate-limit budget, global concurrency cap, and
+    jittered-backoff retries on transient errors, so a single 429 / 5xx doesn't
+    cost the whole paper."""
+    from agents.openai_client import chat  # agents/__init__ imports this module
+    resp = await chat(client=openai_client, **params)
+    return resp.choices[0].message.content or ""
+
+
+async def _cached_completion(openai_client, **params) -> str:
+    """Message content of `chat.completions.create(**params)` on `openai_client`,
+    served from the LLM cache when these exact params were sent before. Cache
+    misses are queued on the Batch API when a dispatcher is active, and
+    otherwise sent via `_create_completion`."""
+    # agents/__init__ imports this module
+    from agents.batch_dispatcher import current_dispatcher
+    from agents.llm_cache import cached_llm, llm_cache_key
+
+    async def _create() -> str:
+        dispatcher = current_dispatcher()
+        if dispatcher is not None:
+            # Batch requests draw on a separate rate-limit pool
+            return await dispatcher.submit(params)
+        return await _create_completion(openai_client, params)
+
+    return await cached_llm(llm_cache_key(params), _create)
+
+
 async def _summarize_section(
     section: PaperSection,
     openai_client,
     model: str = "gpt-4o-mini",
     max_section_tokens: int = 2500,
 ) -> str:
-    """Send a single section to GPT with a targeted prompt. Returns summary text."""
-    prompt = _SECTION_PROMPTS.get(section.name, _SECTION_PROMPTS["other"])
+    """Send a single section to GPT with a targeted prompt. Returns summary text;
+    if the call still fails after retries, the section's opening words, so the
+    rest of the paper's summaries are kept."""
+    template = _USER_TEMPLATES.get(section.name, _USER_TEMPLATES["other"])
     section_text = truncate_to_tokens(section.text, max_tokens=max_section_tokens)
 
-    resp = await openai_client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a scientific research assistant. Be concise and precise. "
-                    "Preserve key numbers, model names, and technical terms exactly."
-                ),
-            },
-            {
-                "role": "user",
-                "content": f"SECTION: {section.label}\n\n{section_text}\n\nTask: {prompt}",
-            },
-        ],
-        temperature=0,
-        max_tokens=400,  # keep section summaries tight (~300 words each)
-    )
-    summary = resp.choices[0].message.content.strip()
+    try:
+        content = await _cached_completion(
+            openai_client,
+            model=model,
+            messages=[
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": template.format(label=section.label, body=section_text)},
+            ],
+            temperature=0,
+            max_tokens=_SECTION_SUMMARY_TOKENS,
+        )
+    except Exception as exc:
+        # Includes non-transient errors (auth, bad request, cache store): logged,
+        # not silently turned into excerpts; 0 attempts = failed before the API
+        logger.exception(
+            "Summarizing section %r failed after %d attempt(s); keeping its opening words",
+            section.label, getattr(exc, "chat_attempts", 0),
+        )
+        return f"## {section.label}\n\n{_opening_words(section.text)}"
+    summary = content.strip()
     return f"## {section.label}\n\n{summary}"
 
 
+def _pack_sections(
+    sections: list[PaperSection],
+    max_section_tokens: int = 2500,
+) -> list[list[tuple[PaperSection, str]]]:
+    """
+    (section, truncated text) groups in document order, each group's text
+    within `_PACKED_MAX_INPUT_TOKENS`.
+    """
+    groups: list[list[tuple[PaperSection, str]]] = []
+    budget = 0
+    for section in sections:
+        text = truncate_to_tokens(section.text, max_tokens=max_section_tokens)
+        tokens = count_tokens(text)
+        if not groups or budget + tokens > _PACKED_MAX_INPUT_TOKENS:
+            groups.append([])
+            budget = 0
+        groups[-1].append((section, text))
+        budget += tokens
+    return groups
+
+
+async def _summarize_all_sections(
+    group: list[tuple[PaperSection, str]],
+    openai_client,
+    model: str = "gpt-4o-mini",
+) -> list[str]:
+    """
+    Summaries (`## label` blocks, in order) of every section in `group` from one
+    JSON-mode request. Sections missing from the reply — or all of them, if it
+    isn't usable JSON — fall back to `_summarize_section`. If the request
+    itself fails, every section keeps its opening words instead.
+    """
+    if len(group) == 1:
+        return [await _summarize_section(group[0][0], openai_client, model)]
+
+    ids = [f"s{i}" for i in range(1, len(group) + 1)]
+    user_msg = "\n\n".join(
+        f"<<<SECTION id={sid} name={section.name} label={section.label}>>>\n{text}\n<<<END>>>"
+        for sid, (section, text) in zip(ids, group)
+    )
+    try:
+        content = await _cached_completion(
+            openai_client,
+            model=model,
+            messages=[
+                _PACKED_SYSTEM_MESSAGE,
+                {"role": "user", "content": user_msg},
+            ],
+            temperature=0,
+            max_tokens=_SECTION_SUMMARY_TOKENS * len(group),
+            response_format={"type": "json_object"},
+        )
+    except Exception as exc:
+        # The request itself failed (retries spent, or auth / bad request):
+        # per-section calls would fail the same way, so don't fan out
+        logger.exception(
+            "Packed summary of %d sections failed after %d attempt(s); keeping their opening words",
+            len(group), getattr(exc, "chat_attempts", 0),
+        )
+        return [f"## {section.label}\n\n{_opening_words(section.text)}" for section, _ in group]
+
+    summaries: dict = {}
+    try:
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        data = None
+    if isinstance(data, dict):
+        summaries = data
+
+    async def _one(sid: str, section: PaperSection) -> str:
+        summary = summaries.get(sid)
+        if isinstance(summary, str) and summary.strip():
+            return f"## {section.label}\n\n{summary.strip()}"
+        return await _summarize_section(section, openai_client, model)
+
+    return list(await asyncio.gather(*(_one(sid, section) for sid, (section, _) in zip(ids, group))))
+
+
+# Back matter — citation lists, thanks, funding — carries no findings
+_SKIP_NAMES = frozenset({"references", "acknowledgments", "funding", "author_contributions"})
+# Sections shorter than this are already summary-sized: kept verbatim, no LLM call
+_VERBATIM_MAX_WORDS = 80
+
+
+def _summarizable(sections: list[PaperSection]) -> list[PaperSection]:
+    return [s for s in sections if s.name not in _SKIP_NAMES and s.word_count > 30]
+
+
+def _shared_client():
+    from agents.openai_client import get_client  # agents/__init__ imports this module
+    return get_client()
+
+
+async def summarize_sections_stream(
+    sections: list[PaperSection],
+    openai_client=None,
+    model: str = "gpt-4o-mini",
+    concurrency: int = 4,
+) -> AsyncIterator[tuple[int, PaperSection, str]]:
+    """
+    Yield `(index, section, summary)` for each of `sections` as its packed
+    request completes (up to `concurrency` in flight), not in document order;
+    `index` is the section's position in `sections`. Sections under
+    `_VERBATIM_MAX_WORDS` words are yielded first, as their own text. Stopping
+    early cancels the requests still running. Without `openai_client` the
+    shared pooled client is used.
+    """
+    if openai_client is None:
+        openai_client = _shared_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded_summarize(indices: list[int], group: list[tuple[PaperSection, str]]):
+        async with semaphore:
+            return indices, group, await _summarize_all_sections(group, openai_client, model)
+
+    to_summarize = [i for i, s in enumerate(sections) if s.word_count >= _VERBATIM_MAX_WORDS]
+    tasks, start = [], 0
+    for group in _pack_sections([sections[i] for i in to_summarize]):
+        tasks.append(asyncio.ensure_future(bounded_summarize(to_summarize[start:start + len(group)], group)))
+        start += len(group)
+    try:
+        for i, section in enumerate(sections):
+            if section.word_count < _VERBATIM_MAX_WORDS:
+                yield i, section, f"## {section.label}\n\n{section.text}"
+        for next_done in asyncio.as_completed(tasks):
+            indices, group, summaries = await next_done
+            for i, (section, _), summary in zip(indices, group, summaries):
+                yield i, section, summary
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def hierarchical_summarize_stream(
+    raw_text: str,
+    openai_client=None,
+    model: str = "gpt-4o-mini",
+    concurrency: int = 4,
+) -> AsyncIterator[tuple[int, PaperSection, str]]:
+    """Split `raw_text` into sections and stream their summaries as they
+    complete — see `summarize_sections_stream`."""
+    sections = await run_text_job(split_into_sections, raw_text)
+    async for item in summarize_sections_stream(_summarizable(sections), openai_client, model, concurrency):
+        yield item
+
+
+# Below this many tokens a paper fits one claim-extraction context as it is:
+# condensing it would only lose detail
+_SINGLE_PASS_MAX_TOKENS = 6000
+
+
+def fits_single_pass(raw_text: str) -> bool:
+    """True if `raw_text` is short enough to use whole instead of condensed."""
+    # A token is at most _MAX_CHARS_PER_TOKEN chars, so longer texts can't fit
+    # and are never encoded just to find that out
+    if len(raw_text) >= _SINGLE_PASS_MAX_TOKENS * _MAX_CHARS_PER_TOKEN:
+        return False
+    return count_tokens(raw_text) < _SINGLE_PASS_MAX_TOKENS
+
+
 async def hierarchical_summarize(
     raw_text: str,
-    openai_client,
+    openai_client=None,
     model: str = "gpt-4o-mini",
     concurrency: int = 4,
 ) -> dict:
     """
-    Split `raw_text` into sections, summarize each in parallel (up to `concurrency`
-    concurrent calls), then return a dict with:
+    Split `raw_text` into sections, summarize them in packed requests (up to
+    `concurrency` concurrent calls; `openai_client` defaults to the shared
+    pooled client), then return a dict with:
 
         condensed_text:  str  — section summaries joined (≈1,500–2,500 words)
         sections:        list — [{"name": ..., "label": ..., "word_count": ...}]
         was_hierarchical: bool — True if sections were detected
-    """
-    sections = split_into_sections(raw_text)
-    was_hierarchical = not (len(sections) == 1 and sections[0].name in ("body", "preamble"))
-
-    # Skip references section — usually just citation list, not useful for summarization
-    sections_to_summarize = [s for s in sections if s.name not in ("references",) and s.word_count > 30]
 
-    # Parallel summarization with concurrency cap
-    semaphore = asyncio.Semaphore(concurrency)
+    Papers that `fits_single_pass` are returned whole, with no request and no
+    section split (`was_hierarchical` False, `section_count` 0).
+    """
+    if fits_single_pass(raw_text):
+        return {
+            "condensed_text": raw_text,
+            "sections": [{"name": "body", "label": "Full Text", "word_count": len(raw_text.split())}],
+            "was_hierarchical": False,
+            "section_count": 0,
+            "verbatim_section_count": 0,
+        }
 
-    async def bounded_summarize(section: PaperSection) -> str:
-        async with semaphore:
-            return await _summarize_section(section, openai_client, model)
+    sections = await run_text_job(split_into_sections, raw_text)
+    was_hierarchical = not (len(sections) == 1 and sections[0].name in ("body", "preamble"))
+    sections_to_summarize = _summarizable(sections)
 
-    summaries = await asyncio.gather(*[bounded_summarize(s) for s in sections_to_summarize])
+    # Collected as they complete, joined back in document order
+    summaries = [""] * len(sections_to_summarize)
+    async for i, _, summary in summarize_sections_stream(sections_to_summarize, openai_client, model, concurrency):
+        summaries[i] = summary
 
     condensed = "\n\n---\n\n".join(summaries)
 
@@ -132,20 +385,55 @@ async def hierarchical_summarize(
         ],
         "was_hierarchical": was_hierarchical,
         "section_count": len(sections_to_summarize),
+        # Summarized sections short enough to be kept as written (no LLM tokens)
+        "verbatim_section_count": sum(s.word_count < _VERBATIM_MAX_WORDS for s in sections_to_summarize),
     }
 
 
+# Batched requests are queued, not sent: every packed group of every paper must be
+# submitted before the dispatcher's linger expires so they share one batch
+_BATCH_CONCURRENCY = 1 << 16
+
+
+async def hierarchical_summarize_batch(
+    papers: list[tuple[str, str]],
+    openai_client=None,
+    model: str = "gpt-4o-mini",
+    **batch_kwargs,
+) -> dict[str, dict]:
+    """
+    `hierarchical_summarize` for each `(doc_id, raw_text)` in `papers`, with
+    every section request sent through the OpenAI Batch API (~50% cheaper,
+    minutes to hours of latency) — for offline corpus ingestion. All papers'
+    requests go out as one batch; sections a packed reply misses follow in a
+    second. `batch_kwargs` go to `BatchDispatcher`. Returns doc_id → result
+    dict.
+    """
+    from agents.batch_dispatcher import batch_mode  # agents/__init__ imports this module
+    if openai_client is None:
+        openai_client = _shared_client()
+    async with batch_mode(openai_client, **batch_kwargs):
+        results = await asyncio.gather(*(
+            hierarchical_summarize(raw_text, openai_client, model, concurrency=_BATCH_CONCURRENCY)
+            for _, raw_text in papers
+        ))
+    return {doc_id: result for (doc_id, _), result in zip(papers, results)}
+
+
+def _opening_words(text: str, n: int = 200) -> str:
+    """The first `n` words of `text`, single-spaced. Only those are read: long
+    sections are never split whole."""
+    return " ".join(m.group() for m in islice(_WORD_RE.finditer(text), n))
+
+
 def keyword_section_summary(raw_text: str) -> str:
     """
     Fallback when OpenAI is not available.
     Splits into sections and returns the first 200 words of each section joined.
     Much better than just taking raw_text[:4000].
     """
-    sections = split_into_sections(raw_text)
-    parts = []
-    for s in sections:
-        if s.name == "references":
-            continue
-        snippet = " ".join(s.text.split()[:200])
-        parts.append(f"## {s.label}\n{snippet}")
-    return "\n\n".join(parts)
+    return "\n\n".join(
+        f"## {s.label}\n{_opening_words(s.text)}"
+        for s in split_into_sections(raw_text)
+        if s.name not in _SKIP_NAMES
+    )
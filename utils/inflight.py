@@ -0,0 +1,42 @@
+"""
+utils/inflight.py
+
+In-flight de-duplication for async lookups. Identical requests already running
+(e.g. syndicated articles with the same text in one batch, or many documents
+from one domain) are coalesced: the first caller awaits the work and every
+concurrent duplicate awaits its result.
+
+Each user owns its own `Coalescer`, so unrelated key spaces never share a table.
+"""
+from __future__ import annotations
+import asyncio
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class Coalescer(Generic[T]):
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Await `factory()` once for all concurrent callers sharing `key`."""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            fut.exception()  # mark retrieved so an unshared failure isn't logged twice
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
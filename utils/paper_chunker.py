@@ -11,21 +11,33 @@ Designed for:
   - Pasted plaintext from papers
 """
 from __future__ import annotations
+import hashlib
 import re
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from functools import cache
+from itertools import islice
+import ahocorasick
 
 # ── Section definitions ────────────────────────────────────────────────────────
 
-# Ordered list of canonical sections with regex aliases
-_SECTIONS: list[tuple[str, str]] = [
-    # (canonical name, regex pattern)
-    ("abstract",      r"\babstract\b"),
-    ("introduction",  r"\b(introduction|background|overview)\b"),
-    ("related_work",  r"\b(related\s+work|literature\s+review|prior\s+work|previous\s+work)\b"),
-    ("methods",       r"\b(method(?:s|ology)?|approach|model|framework|experimental\s+setup|materials\s+and\s+methods)\b"),
-    ("results",       r"\b(result(?:s)?|experiment(?:s)?|evaluation|findings|empirical)\b"),
-    ("discussion",    r"\b(discussion|analysis|ablation|limitations?)\b"),
-    ("conclusion",    r"\b(conclusion(?:s)?|summary|future\s+work|closing\s+remarks)\b"),
+# Ordered list of canonical sections with their header aliases (whole words,
+# lowercase, single-spaced). Earlier sections win when a header names several,
+# e.g. "Results and Discussion" → results.
+_SECTIONS: list[tuple[str, tuple[str, ...]]] = [
+    ("abstract",      ("abstract",)),
+    ("introduction",  ("introduction", "background", "overview")),
+    ("related_work",  ("related work", "literature review", "prior work", "previous work")),
+    ("methods",       ("method", "methods", "methodology", "approach", "model", "framework",
+                       "experimental setup", "materials and methods")),
+    ("results",       ("result", "results", "experiment", "experiments", "evaluation", "findings", "empirical")),
+    ("discussion",    ("discussion", "analysis", "ablation", "limitation", "limitations")),
+    ("conclusion",    ("conclusion", "conclusions", "summary", "future work", "closing remarks")),
+    # Back matter: detected so the summarizers can leave it out
+    ("references",    ("references", "bibliography")),
+    ("acknowledgments", ("acknowledgments", "acknowledgements", "acknowledgment", "acknowledgement")),
+    ("funding",       ("funding",)),
+    ("author_contributions", ("author contributions", "author contribution")),
 ]
 
 # How a section header looks in a paper:
@@ -41,20 +53,76 @@ _HEADER_RE = re.compile(
 )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PaperSection:
     name: str        # canonical name (e.g. "methods")
     label: str       # as it appeared in the paper (e.g. "3. METHODOLOGY")
-    text: str        # raw content of the section
     word_count: int
+    # The paper's full text and the (start, end) spans of this section's
+    # content in it: more than one when short sections were merged in
+    source: str = field(repr=False)
+    spans: tuple[tuple[int, int], ...] = field(repr=False)
+
+    @property
+    def text(self) -> str:
+        """Raw content of the section, sliced from `source` on access."""
+        if len(self.spans) == 1:
+            start, end = self.spans[0]
+            return self.source[start:end]
+        return "\n\n".join(self.source[start:end] for start, end in self.spans)
+
+
+# One automaton over every alias: a single pass over the label finds all hits
+def _build_section_automaton() -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for priority, (canonical, aliases) in enumerate(_SECTIONS):
+        for alias in aliases:
+            automaton.add_word(alias, (priority, canonical, len(alias)))
+    automaton.make_automaton()
+    return automaton
+
+
+_SECTION_AC = _build_section_automaton()
+
+# Single-word headers that are still real sections
+_SHORT_HEADER_RE = re.compile(
+    r"abstract|introduction|conclusion|result|method|references|bibliography|acknowledg|funding",
+    re.IGNORECASE,
+)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
 
 
 def _label_to_canonical(label: str) -> str:
-    lower = label.lower().strip()
-    for canonical, pattern in _SECTIONS:
-        if re.search(pattern, lower):
-            return canonical
-    return "other"
+    lower = " ".join(label.lower().split())
+    best: tuple[int, str] | None = None
+    for end, (priority, canonical, length) in _SECTION_AC.iter(lower):
+        start = end - length + 1
+        # Whole words only: "models" is not "model"
+        if start > 0 and _is_word_char(lower[start - 1]):
+            continue
+        if end + 1 < len(lower) and _is_word_char(lower[end + 1]):
+            continue
+        if best is None or priority < best[0]:
+            best = (priority, canonical)
+    return best[1] if best else "other"
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """`text[start:end].strip()` as offsets into `text`, without copying."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+# Recent splits by content hash: the research agent and the summarizers often
+# split the same paper more than once. Sections are frozen, so they are shared.
+_SPLIT_CACHE_MAX_ENTRIES = 64
+_split_cache: OrderedDict[tuple[bytes, int], tuple[PaperSection, ...]] = OrderedDict()
 
 
 def split_into_sections(text: str, min_section_words: int = 30) -> list[PaperSection]:
@@ -63,14 +131,28 @@ def split_into_sections(text: str, min_section_words: int = 30) -> list[PaperSec
 
     Returns a list ordered by appearance in the document. Sections shorter than
     `min_section_words` are merged into the previous section (often page headers /
-    figure captions).
+    figure captions). Sections hold offsets into `text`; their `.text` is only
+    sliced out when read. Repeat calls for the same text skip the scan.
     """
+    key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), min_section_words)
+    cached = _split_cache.get(key)
+    if cached is not None:
+        _split_cache.move_to_end(key)
+        return list(cached)
+    sections = _split_into_sections(text, min_section_words)
+    _split_cache[key] = tuple(sections)
+    while len(_split_cache) > _SPLIT_CACHE_MAX_ENTRIES:
+        _split_cache.popitem(last=False)
+    return sections
+
+
+def _split_into_sections(text: str, min_section_words: int) -> list[PaperSection]:
     # Find all header positions
     headers: list[tuple[int, str]] = []  # (start_char, header_text)
     for m in _HEADER_RE.finditer(text):
         label = m.group(1).strip()
         # Filter out very short headings that are probably page numbers / figure labels
-        if len(label.split()) < 2 and not re.search(r"abstract|introduction|conclusion|result|method", label, re.I):
+        if len(label.split()) < 2 and not _SHORT_HEADER_RE.search(label):
             continue
         headers.append((m.start(), label))
 
@@ -79,42 +161,46 @@ def split_into_sections(text: str, min_section_words: int = 30) -> list[PaperSec
         return [PaperSection(
             name="body",
             label="Full Text",
-            text=text,
             word_count=len(text.split()),
+            source=text,
+            spans=((0, len(text)),),
         )]
 
     sections: list[PaperSection] = []
 
     # Text before the first header → preamble (title page, cover)
     if headers[0][0] > 0:
-        preamble = text[:headers[0][0]].strip()
-        if preamble:
+        p_start, p_end = _strip_span(text, 0, headers[0][0])
+        if p_end > p_start:
             sections.append(PaperSection(
                 name="preamble",
                 label="Preamble",
-                text=preamble,
-                word_count=len(preamble.split()),
+                word_count=len(text[p_start:p_end].split()),
+                source=text,
+                spans=((p_start, p_end),),
             ))
 
     for i, (start, label) in enumerate(headers):
         end = headers[i + 1][0] if i + 1 < len(headers) else len(text)
-        section_text = text[start:end].strip()
-        # Remove the header line itself from the body text
-        section_body = "\n".join(section_text.split("\n")[1:]).strip()
+        start, end = _strip_span(text, start, end)
+        # The body starts after the header line itself
+        newline = text.find("\n", start, end)
+        body = _strip_span(text, newline + 1, end) if newline != -1 else (end, end)
 
-        wc = len(section_body.split())
+        wc = len(text[body[0]:body[1]].split())
         canonical = _label_to_canonical(label)
 
         if wc < min_section_words and sections:
             # Merge tiny section into the previous one
-            sections[-1].text += "\n\n" + section_body
-            sections[-1].word_count += wc
+            prev = sections[-1]
+            sections[-1] = replace(prev, spans=(*prev.spans, body), word_count=prev.word_count + wc)
         else:
             sections.append(PaperSection(
                 name=canonical,
                 label=label,
-                text=section_body,
                 word_count=wc,
+                source=text,
+                spans=(body,),
             ))
 
     return sections
@@ -128,24 +214,66 @@ def fixed_chunks(text: str, chunk_words: int = 300, overlap_words: int = 50) ->
     or as the primary chunker for the RAG FAISS index.
     """
     words = text.split()
-    chunks = []
     step = max(chunk_words - overlap_words, 1)
-    for i in range(0, len(words), step):
-        chunk = " ".join(words[i:i + chunk_words])
-        if chunk:
-            chunks.append(chunk)
-    return chunks
+    # Windows are never empty: split() yields no empty words. Joining list
+    # slices in C beats slicing the text by regex word offsets.
+    return [" ".join(words[i:i + chunk_words]) for i in range(0, len(words), step)]
 
 
 # ── Token-budget truncation ───────────────────────────────────────────────────
 
+_TRUNCATION_MARKER = "\n\n[... truncated for length ...]"
+_WORD_RE = re.compile(r"\S+")
+# Generous upper bound on characters per token: a prefix this long almost
+# always holds more than `max_tokens` tokens, so long texts are only
+# encoded up to about the cut point
+_MAX_CHARS_PER_TOKEN = 8
+
+
+@cache
+def _token_encoding():
+    """tiktoken encoding of the configured OpenAI model; None if unknown or its
+    BPE file can't be fetched (offline), in which case counts are word-based."""
+    try:
+        import tiktoken
+        from config import settings
+        return tiktoken.encoding_for_model(settings.openai_model)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text` for the configured model (≈ words / 0.75 without tiktoken)."""
+    enc = _token_encoding()
+    if enc is None:
+        return int(len(text.split()) / 0.75)
+    return len(enc.encode_ordinary(text))
+
+
 def truncate_to_tokens(text: str, max_tokens: int = 3000) -> str:
     """
-    Rough truncation (1 token ≈ 0.75 words). Used to cap individual section
-    text before sending to GPT.
+    Cap `text` at `max_tokens` model tokens, cut on a token boundary. Used to
+    cap individual section text before sending to GPT. Without tiktoken, falls
+    back to 1 token ≈ 0.75 words. Either way only the head of a long text is
+    scanned.
     """
-    max_words = int(max_tokens * 0.75)
-    words = text.split()
-    if len(words) <= max_words:
+    enc = _token_encoding()
+    if enc is None:
+        return _truncate_to_words(text, int(max_tokens * 0.75))
+    head = text[: max_tokens * _MAX_CHARS_PER_TOKEN]
+    ids = enc.encode_ordinary(head)
+    if len(ids) <= max_tokens and len(head) < len(text):
+        ids = enc.encode_ordinary(text)  # unusually long tokens: count the whole text
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens]) + _TRUNCATION_MARKER
+
+
+def _truncate_to_words(text: str, max_words: int) -> str:
+    """`text` up to its `max_words`-th word, found without splitting the whole text."""
+    end = 0
+    for m in islice(_WORD_RE.finditer(text), max_words):
+        end = m.end()
+    if _WORD_RE.search(text, end) is None:
         return text
-    return " ".join(words[:max_words]) + "\n\n[... truncated for length ...]"
+    return text[:end] + _TRUNCATION_MARKER
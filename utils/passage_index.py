@@ -0,0 +1,83 @@
+"""
+utils/passage_index.py
+
+Per-document passage embeddings for /qa retrieval. At summarize time each
+document's stored text is split into overlapping word windows and embedded
+with the conflict resolver's MiniLM model; the vectors are kept on the
+DocumentRecord as float16 bytes. A question is then answered from the top-k
+passages across the report's documents instead of a fixed text prefix of each.
+
+Passages are sized to MiniLM's 256-token input limit — longer windows would be
+silently truncated by the encoder.
+"""
+from __future__ import annotations
+import numpy as np
+from db.models import DocumentRecord
+
+PASSAGE_WORDS = 180
+PASSAGE_OVERLAP = 30
+# Bounds the summarize-time encode cost for very long documents
+MAX_PASSAGES_PER_DOC = 512
+_EMBED_DTYPE = np.float16
+
+
+def split_passages(text: str) -> list[str]:
+    """Overlapping `PASSAGE_WORDS`-word windows over `text`."""
+    words = text.split()
+    step = PASSAGE_WORDS - PASSAGE_OVERLAP
+    return [
+        " ".join(words[i: i + PASSAGE_WORDS])
+        for i in range(0, len(words), step)
+    ][:MAX_PASSAGES_PER_DOC]
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    from conflict.resolver import _get_model, _ENCODE_BATCH_SIZE
+    return _get_model().encode(
+        texts,
+        batch_size=_ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+
+def index_passages(docs: list[DocumentRecord]) -> None:
+    """Fill `passages` / `passage_embeddings` on each doc. Blocking (model encode):
+    one encode call covers every passage of every doc."""
+    per_doc = [split_passages(doc.raw_text) for doc in docs]
+    flat = [p for passages in per_doc for p in passages]
+    if not flat:
+        return
+    vectors = _encode(flat).astype(_EMBED_DTYPE)
+    start = 0
+    for doc, passages in zip(docs, per_doc):
+        end = start + len(passages)
+        doc.passages = passages
+        doc.passage_embeddings = vectors[start:end].tobytes()
+        start = end
+
+
+def has_passage_index(doc: DocumentRecord) -> bool:
+    return bool(doc.passages) and bool(doc.passage_embeddings)
+
+
+def top_passages(question: str, docs: list[DocumentRecord], k: int = 8) -> list[tuple[int, str]]:
+    """
+    The `k` passages most similar to `question` across `docs`, as
+    (doc index, passage) in document then reading order. Blocking (model encode).
+    Every doc must have a passage index.
+    """
+    matrices = [
+        np.frombuffer(doc.passage_embeddings, dtype=_EMBED_DTYPE).reshape(len(doc.passages), -1)
+        for doc in docs
+    ]
+    owners = np.repeat(np.arange(len(docs)), [len(doc.passages) for doc in docs])
+    embeddings = np.vstack(matrices).astype(np.float32)
+    query = _encode([question])[0]
+    # Unit vectors: one matmul scores every passage
+    scores = embeddings @ query
+    k = min(k, len(scores))
+    best = np.sort(np.argpartition(-scores, k - 1)[:k])
+    offsets = np.concatenate(([0], np.cumsum([len(doc.passages) for doc in docs])))
+    return [(int(owners[i]), docs[owners[i]].passages[i - offsets[owners[i]]]) for i in best]
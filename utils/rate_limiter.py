@@ -0,0 +1,62 @@
+"""
+utils/rate_limiter.py
+
+Client-side budget for OpenAI's per-minute rate limits. OpenAI meters both
+requests (RPM) and tokens (TPM, prompt + max_tokens); a fixed concurrency cap
+either leaves headroom unused on small requests or trips 429s on large ones.
+`AsyncTokenBucket.acquire(tokens)` instead waits until both budgets can cover
+the next request, refilling continuously at the configured rates.
+
+Budgets start full (one minute's worth), matching how OpenAI allows bursts.
+Chat completions are charged in `agents.openai_client` (`chat` and
+`completion_slot`); embedding requests are not metered here.
+"""
+from __future__ import annotations
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    def __init__(self, rpm: int, tpm: int):
+        self._rpm = float(rpm)
+        self._tpm = float(tpm)
+        self._requests = self._rpm
+        self._tokens = self._tpm
+        self._updated = time.monotonic()
+        # Waiters queue on the lock, so requests are admitted in arrival order
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        self._requests = min(self._rpm, self._requests + elapsed * self._rpm / 60)
+        self._tokens = min(self._tpm, self._tokens + elapsed * self._tpm / 60)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request of `tokens` tokens fits both budgets, then spend it."""
+        tokens = min(float(tokens), self._tpm)  # an oversize request waits for a full bucket, not forever
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep(max(
+                    (1 - self._requests) * 60 / self._rpm,
+                    (tokens - self._tokens) * 60 / self._tpm,
+                ))
+
+
+_limiter: AsyncTokenBucket | None = None
+
+
+def openai_limiter() -> AsyncTokenBucket | None:
+    """The process-wide bucket for `settings.openai_rpm` / `openai_tpm`; None if either is 0."""
+    global _limiter
+    from config import settings
+    if not settings.openai_rpm or not settings.openai_tpm:
+        return None
+    if _limiter is None:
+        _limiter = AsyncTokenBucket(settings.openai_rpm, settings.openai_tpm)
+    return _limiter